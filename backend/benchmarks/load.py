@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Load test: drives every api_router route against the in-process app
+
+Seeds a deterministic dataset, then runs each route scenario with N requests
+at a fixed concurrency through httpx's ASGI transport (no network), and
+reports throughput and p50/p95/p99 latency per route as JSON.
+
+MongoDB can be:
+  - mongomock (default): in-memory mongomock-motor, no server needed. It does
+    not support $text or explain, so search and the index audit are skipped
+  - spawn:   an ephemeral mongod (binary on PATH) in a temporary directory
+  - a mongodb:// URL: the --db database on it is dropped before and after
+
+Profiles: small = 1k posts / 20k contacts, full = 10k posts / 500k contacts.
+Results are comparable across commits when run with the same profile,
+backend, concurrency and request count; --compare flags regressions.
+
+Usage (from backend/):
+    python -m benchmarks.load [--profile small|full] [--mongo mongomock|spawn|URL]
+                              [--concurrency 16] [--requests 200] [--routes REGEX]
+                              [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+PROFILES = {
+    "small": {"posts": 1000, "contacts": 20000},
+    "full": {"posts": 10000, "contacts": 500000},
+}
+
+WORDS = (
+    "database access excel query report schema index relational table form macro automation "
+    "spreadsheet migration backup performance normalisation invoice customer inventory workflow "
+    "dashboard integration security audit consultant business"
+).split()
+
+STATUSES = ["new", "contacted", "completed"]
+
+
+# ============================================================================
+# Environment
+# ============================================================================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_mongod():
+    """Start a throwaway mongod; returns (process, data_dir, url)"""
+    binary = shutil.which("mongod")
+    if not binary:
+        sys.exit("--mongo spawn needs a mongod binary on PATH")
+    data_dir = tempfile.mkdtemp(prefix="load-benchmark-")
+    port = free_port()
+    process = subprocess.Popen(
+        [binary, "--dbpath", data_dir, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    from pymongo import MongoClient
+    url = f"mongodb://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            MongoClient(url, serverSelectionTimeoutMS=500).admin.command("ping")
+            return process, data_dir, url
+        except Exception:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                shutil.rmtree(data_dir, ignore_errors=True)
+                sys.exit("mongod did not start")
+            time.sleep(0.2)
+
+
+def configure_environment(args):
+    """Settings that must be in place before server is imported"""
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db
+    # Measure the handlers, not the abuse protection
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["ADMISSION_MAX_IN_FLIGHT"] = "1000000"
+    os.environ["SLOW_REQUEST_MS"] = "1e12"
+    # Publish into a scratch directory so the static publish route (and the
+    # admin write hook) run as they do in deployments that use it
+    args.static_dir = tempfile.mkdtemp(prefix="load-static-")
+    os.environ["STATIC_OUTPUT_DIR"] = args.static_dir
+    # server configures INFO logging; httpx would log every request and bury
+    # the results table
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================================================
+# Dataset
+# ============================================================================
+
+@dataclass
+class Dataset:
+    """Ids and keys the scenarios draw from; victim pools are consumed by deletes"""
+    posts: List[Dict[str, Any]] = field(default_factory=list)
+    testimonial_ids: List[str] = field(default_factory=list)
+    contact_ids: List[str] = field(default_factory=list)
+    service_ids: List[str] = field(default_factory=list)
+    post_victims: List[str] = field(default_factory=list)
+    testimonial_victims: List[str] = field(default_factory=list)
+    admin_headers: Dict[str, str] = field(default_factory=dict)
+    run_id: str = ""
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_post(server, rng: random.Random, index: int, now: datetime, prefix: str = "bench-post") -> Dict[str, Any]:
+    title = sentence(rng, 6)[:-1]
+    sections = "\n\n".join(
+        f"## {sentence(rng, 3)[:-1]}\n\n" + "\n\n".join(sentence(rng, 40) for _ in range(3))
+        for _ in range(4)
+    )
+    published_at = now - timedelta(minutes=index * 37)
+    post = {
+        "title": title,
+        "slug": f"{prefix}-{index}",
+        "excerpt": sentence(rng, 20),
+        "content": f"# {title}\n\n{sections}",
+        "category": rng.choice(["Database Strategy", "Technology Comparison", "Automation", "Reporting"]),
+        "published": rng.random() < 0.9,
+        "publishDate": published_at,
+        "createdAt": published_at,
+        "updatedAt": published_at,
+        "seoTitle": f"{title} | Christopher Merrick",
+        "seoDescription": sentence(rng, 15),
+    }
+    return server.with_rendered_content(post)
+
+
+async def insert_batches(collection, docs, batch_size: int = 10000):
+    for start in range(0, len(docs), batch_size):
+        await collection.insert_many(docs[start:start + batch_size])
+
+
+async def seed(server, sizes: Dict[str, int], victims: int, seed_value: int) -> Dataset:
+    rng = random.Random(seed_value)
+    now = server.utc_now()
+    dataset = Dataset(run_id=f"{seed_value}-{int(time.time())}")
+
+    posts = [make_post(server, rng, index, now) for index in range(sizes["posts"])]
+    posts += [make_post(server, rng, index, now, prefix="bench-victim") for index in range(victims)]
+    await insert_batches(server.db.blog_posts, posts)
+    dataset.posts = [post for post in posts if post["slug"].startswith("bench-post") and post["published"]]
+    dataset.post_victims = [str(post["_id"]) for post in posts if post["slug"].startswith("bench-victim")]
+
+    testimonials = [
+        {
+            "name": sentence(rng, 2)[:-1],
+            "company": sentence(rng, 2)[:-1],
+            "location": rng.choice(["Leeds", "York", "Bradford", "Harrogate"]),
+            "text": sentence(rng, 30),
+            "rating": rng.randint(4, 5),
+            "published": True,
+            "createdAt": now - timedelta(days=index),
+            "updatedAt": now - timedelta(days=index),
+        }
+        for index in range(50 + victims)
+    ]
+    await insert_batches(server.db.testimonials, testimonials)
+    dataset.testimonial_ids = [str(doc["_id"]) for doc in testimonials[:50]]
+    dataset.testimonial_victims = [str(doc["_id"]) for doc in testimonials[50:]]
+
+    span_minutes = 365 * 24 * 60
+    contacts = [
+        {
+            "name": sentence(rng, 2)[:-1],
+            "email": f"contact{index}@example.com",
+            "phone": None,
+            "company": sentence(rng, 2)[:-1],
+            "consultationType": rng.choice(["Free Consultation", "Database Design", "Automation"]),
+            "message": sentence(rng, 25),
+            "status": rng.choice(STATUSES),
+            "submittedAt": now - timedelta(minutes=rng.randrange(span_minutes)),
+            "notes": None,
+        }
+        for index in range(sizes["contacts"])
+    ]
+    await insert_batches(server.db.contact_submissions, contacts)
+    dataset.contact_ids = [str(doc["_id"]) for doc in contacts[:1000]]
+
+    subscriptions = [
+        {"email": f"subscriber{index}@example.com", "subscribedAt": now - timedelta(minutes=rng.randrange(span_minutes))}
+        for index in range(sizes["contacts"] // 10)
+    ]
+    await insert_batches(server.db.newsletter_subscriptions, subscriptions)
+
+    await server.rebuild_analytics_rollups(None, None)
+    return dataset
+
+
+# ============================================================================
+# Scenarios
+# ============================================================================
+
+@dataclass
+class Scenario:
+    method: str
+    path: str  # route template, as registered on api_router
+    build: Callable[[Dataset, int], Dict[str, Any]] = lambda data, i: {}
+    admin: bool = False
+    expected: tuple = (200,)
+    max_requests: Optional[int] = None  # for inherently slow routes (bcrypt, rebuilds)
+    mongod_only: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+def post_body(data: Dataset, i: int, slug: str) -> Dict[str, Any]:
+    return {
+        "title": f"Load test post {i}",
+        "slug": slug,
+        "excerpt": "Load test excerpt",
+        "content": f"# Load test post {i}\n\n" + "Relational schemas keep reporting fast. " * 50,
+        "category": "Database Strategy",
+        "published": True,
+    }
+
+
+def testimonial_body(i: int) -> Dict[str, Any]:
+    return {"name": f"Client {i}", "company": "Example Ltd", "location": "Leeds", "text": "Great work.", "rating": 5}
+
+
+def import_upload(data: Dataset, i: int) -> Dict[str, Any]:
+    lines = [json.dumps(post_body(data, i, f"bench-import-{data.run_id}-{i}-{n}")) for n in range(10)]
+    return {"files": {"file": ("posts.ndjson", "\n".join(lines).encode("utf-8"), "application/x-ndjson")}}
+
+
+def recent_window(days: int) -> Dict[str, str]:
+    end = datetime.utcnow()
+    return {"start": (end - timedelta(days=days)).isoformat(), "end": end.isoformat()}
+
+
+SEARCH_TERMS = ["database", "access report", "excel migration", "automation workflow", "index performance"]
+
+SCENARIOS: List[Scenario] = [
+    Scenario("GET", "/api/health"),
+    Scenario("GET", "/api/"),
+    Scenario("GET", "/api/blog", lambda data, i: {"params": {"skip": (i % 10) * 10, "limit": 10}}),
+    Scenario("GET", "/api/blog/summaries", lambda data, i: {"params": {"skip": (i % 10) * 10, "limit": 20}}),
+    Scenario("GET", "/api/blog/search", lambda data, i: {"params": {"q": SEARCH_TERMS[i % len(SEARCH_TERMS)]}}, mongod_only=True),
+    Scenario("GET", "/api/blog/{slug}", lambda data, i: {"url": f"/api/blog/{data.posts[i % len(data.posts)]['slug']}", "params": {"render": i % 2 == 0}}),
+    Scenario("GET", "/api/testimonials"),
+    Scenario("GET", "/api/services"),
+    Scenario("POST", "/api/contact", lambda data, i: {"json": {
+        "name": "Load Test", "email": f"load{i}@example.com", "consultationType": "Free Consultation",
+        "message": "I would like to discuss a database for our team.",
+    }}, expected=(200, 202)),
+    Scenario("POST", "/api/newsletter", lambda data, i: {"json": {"email": f"load-{data.run_id}-{i}@example.com"}}, expected=(200, 202)),
+    Scenario("POST", "/api/auth/login", lambda data, i: {"json": {"email": "admin@christophermerrick.co.uk", "password": "admin123"}}, max_requests=20),
+    Scenario("GET", "/api/auth/me", admin=True),
+    Scenario("GET", "/api/admin/blog", admin=True),
+    Scenario("POST", "/api/admin/blog", lambda data, i: {"json": post_body(data, i, f"bench-new-{data.run_id}-{i}")}, admin=True),
+    Scenario("PUT", "/api/admin/blog/{post_id}", lambda data, i: (lambda post: {
+        "url": f"/api/admin/blog/{post['_id']}", "json": {**post_body(data, i, post["slug"]), "title": post["title"]},
+    })(data.posts[i % len(data.posts)]), admin=True),
+    Scenario("DELETE", "/api/admin/blog/{post_id}", lambda data, i: {"url": f"/api/admin/blog/{data.post_victims.pop()}"}, admin=True),
+    Scenario("POST", "/api/admin/blog/bulk", lambda data, i: {"json": {
+        "ids": [str(post["_id"]) for post in data.posts[(i * 20) % len(data.posts):][:20]], "action": "publish",
+    }}, admin=True),
+    Scenario("POST", "/api/admin/blog/import", import_upload, admin=True, max_requests=50),
+    Scenario("GET", "/api/admin/testimonials", admin=True),
+    Scenario("POST", "/api/admin/testimonials", lambda data, i: {"json": testimonial_body(i)}, admin=True),
+    Scenario("PUT", "/api/admin/testimonials/{testimonial_id}", lambda data, i: {
+        "url": f"/api/admin/testimonials/{data.testimonial_ids[i % len(data.testimonial_ids)]}", "json": testimonial_body(i),
+    }, admin=True),
+    Scenario("DELETE", "/api/admin/testimonials/{testimonial_id}", lambda data, i: {"url": f"/api/admin/testimonials/{data.testimonial_victims.pop()}"}, admin=True),
+    Scenario("POST", "/api/admin/testimonials/bulk", lambda data, i: {"json": {"ids": data.testimonial_ids[:10], "action": "publish"}}, admin=True),
+    Scenario("GET", "/api/admin/contacts", lambda data, i: {"params": {"skip": (i % 10) * 50, "limit": 50}}, admin=True),
+    Scenario("PUT", "/api/admin/contacts/{contact_id}", lambda data, i: {
+        "url": f"/api/admin/contacts/{data.contact_ids[i % len(data.contact_ids)]}", "params": {"status": STATUSES[i % 3]},
+    }, admin=True),
+    Scenario("POST", "/api/admin/contacts/bulk-status", lambda data, i: {"json": {
+        "ids": data.contact_ids[(i * 50) % len(data.contact_ids):][:50], "status": STATUSES[i % 3],
+    }}, admin=True),
+    Scenario("GET", "/api/admin/export/contacts", lambda data, i: {"params": {"format": ["csv", "ndjson"][i % 2], **recent_window(7)}}, admin=True, max_requests=50),
+    Scenario("GET", "/api/admin/export/newsletter", lambda data, i: {"params": recent_window(7)}, admin=True, max_requests=50),
+    Scenario("GET", "/api/admin/services", admin=True),
+    Scenario("PUT", "/api/admin/services/{service_id}", lambda data, i: {
+        "url": f"/api/admin/services/{data.service_ids[i % len(data.service_ids)]}", "json": {"published": True},
+    }, admin=True),
+    Scenario("GET", "/api/admin/analytics", admin=True),
+    Scenario("GET", "/api/admin/analytics/timeseries", lambda data, i: {"params": {"interval": ["day", "week", "month"][i % 3]}}, admin=True),
+    Scenario("POST", "/api/admin/analytics/rollups/rebuild", lambda data, i: {"params": recent_window(30)}, admin=True, max_requests=10),
+    Scenario("GET", "/api/admin/indexes/audit", admin=True, max_requests=5, mongod_only=True),
+    Scenario("POST", "/api/admin/static/publish", admin=True, max_requests=20),
+    Scenario("GET", "/api/admin/traces/slow", admin=True),
+    Scenario("GET", "/api/admin/admission/stats", admin=True),
+    Scenario("GET", "/api/admin/ingestion/stats", admin=True),
+    Scenario("GET", "/api/admin/password-hasher/stats", admin=True),
+    Scenario("GET", "/api/admin/cache/stats", admin=True),
+    Scenario("POST", "/api/admin/events/ticket", admin=True),
+]
+
+
+# Routes a request/response scenario can't exercise
+UNSCENARIOED_ROUTES = {"GET /api/admin/events"}  # never-ending event stream
+
+
+def uncovered_routes(server) -> List[str]:
+    """api_router routes with no scenario, so new routes are noticed"""
+    covered = {scenario.name for scenario in SCENARIOS} | UNSCENARIOED_ROUTES
+    registered = {
+        f"{method} {route.path}" for route in server.api_router.routes for method in getattr(route, "methods", ()) if method != "HEAD"
+    }
+    return sorted(registered - covered)
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))]
+
+
+async def run_scenario(client, scenario: Scenario, data: Dataset, total: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    def request_kwargs(i: int) -> Dict[str, Any]:
+        kwargs = {"url": scenario.path, **scenario.build(data, i)}
+        if scenario.admin:
+            kwargs["headers"] = data.admin_headers
+        return kwargs
+
+    for i in range(warmup):
+        await client.request(scenario.method, **request_kwargs(total + i))
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    indexes = itertools.count()
+
+    async def worker():
+        for i in indexes:
+            if i >= total:
+                return
+            kwargs = request_kwargs(i)
+            started = time.perf_counter()
+            response = await client.request(scenario.method, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    as_ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": total,
+        "concurrency": min(concurrency, total),
+        "throughput": round(total / elapsed, 1) if elapsed else 0.0,
+        "latencyMs": {
+            "mean": as_ms(sum(latencies) / len(latencies)),
+            "p50": as_ms(percentile(latencies, 50)),
+            "p95": as_ms(percentile(latencies, 95)),
+            "p99": as_ms(percentile(latencies, 99)),
+            "max": as_ms(latencies[-1]),
+        },
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "errors": sum(count for code, count in statuses.items() if code not in scenario.expected),
+    }
+
+
+async def run(args, server) -> Dict[str, Any]:
+    import httpx
+
+    sizes = {**PROFILES[args.profile], **{key: value for key, value in (("posts", args.posts), ("contacts", args.contacts)) if value}}
+    selected = [scenario for scenario in SCENARIOS if re.search(args.routes, scenario.name)]
+    skipped = [scenario.name for scenario in selected if scenario.mongod_only and args.mongo == "mongomock"]
+    selected = [scenario for scenario in selected if scenario.name not in skipped]
+    victims = args.requests + args.warmup
+
+    await server.client.drop_database(args.db)
+    print(f"Seeding {sizes['posts']} posts, {sizes['contacts']} contacts...", file=sys.stderr)
+    seed_started = time.perf_counter()
+    data = await seed(server, sizes, victims, args.seed)
+    seed_seconds = time.perf_counter() - seed_started
+
+    await server.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            login = await client.post("/api/auth/login", json={"email": "admin@christophermerrick.co.uk", "password": "admin123"})
+            login.raise_for_status()
+            data.admin_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            data.service_ids = [str(doc["_id"]) async for doc in server.db.services.find({}, {"_id": 1})]
+
+            routes = {}
+            for scenario in selected:
+                total = min(args.requests, scenario.max_requests or args.requests)
+                result = await run_scenario(client, scenario, data, total, args.concurrency, min(args.warmup, total))
+                routes[scenario.name] = result
+                print(
+                    f"{scenario.name:48} {result['throughput']:>9} req/s  p50 {result['latencyMs']['p50']:>8}ms  "
+                    f"p95 {result['latencyMs']['p95']:>8}ms  p99 {result['latencyMs']['p99']:>8}ms  errors {result['errors']}",
+                    file=sys.stderr,
+                )
+    finally:
+        await server.app.router.shutdown()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "encoder": "orjson" if server.orjson else "json",
+            "mongo": args.mongo if args.mongo in ("mongomock", "spawn") else "url",
+            "profile": args.profile,
+            "dataset": sizes,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seedSeconds": round(seed_seconds, 2),
+        },
+        "routes": routes,
+        "skipped": skipped,
+        "uncovered": uncovered_routes(server),
+    }
+
+
+# ============================================================================
+# Comparison
+# ============================================================================
+
+COMPARABLE_META = ("mongo", "profile", "dataset", "concurrency", "requests")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Routes whose p95 rose or throughput fell by more than ``threshold``"""
+    for key in COMPARABLE_META:
+        if results["meta"].get(key) != baseline["meta"].get(key):
+            print(f"warning: baseline {key} differs ({baseline['meta'].get(key)} vs {results['meta'].get(key)})", file=sys.stderr)
+
+    regressions = []
+    for name, current in results["routes"].items():
+        previous = baseline["routes"].get(name)
+        if not previous:
+            continue
+        p95_ratio = current["latencyMs"]["p95"] / previous["latencyMs"]["p95"] if previous["latencyMs"]["p95"] else 1.0
+        throughput_ratio = current["throughput"] / previous["throughput"] if previous["throughput"] else 1.0
+        if p95_ratio > 1 + threshold or throughput_ratio < 1 - threshold:
+            regressions.append(
+                f"{name}: p95 {previous['latencyMs']['p95']}ms -> {current['latencyMs']['p95']}ms, "
+                f"throughput {previous['throughput']} -> {current['throughput']} req/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small", help="Dataset size")
+    parser.add_argument("--posts", type=int, help="Override the profile's post count")
+    parser.add_argument("--contacts", type=int, help="Override the profile's contact count")
+    parser.add_argument("--mongo", default="mongomock", help="mongomock, spawn, or a mongodb:// URL")
+    parser.add_argument("--db", default="load_benchmark", help="Database to create (and drop) for the run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests per route")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per route")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per route before measuring")
+    parser.add_argument("--routes", default="", help="Only run routes whose 'METHOD /path' matches this regex")
+    parser.add_argument("--seed", type=int, default=1, help="Dataset random seed")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed p95/throughput change before flagging (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    mongod = None
+    if args.mongo == "mongomock":
+        args.mongo_url = "mongodb://localhost:27017"
+    elif args.mongo == "spawn":
+        mongod = spawn_mongod()
+        args.mongo_url = mongod[2]
+    else:
+        args.mongo_url = args.mongo
+    configure_environment(args)
+
+    import server
+    if args.mongo == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        server.client = AsyncMongoMockClient()
+        server.db = server.public_db = server.TracedDatabase(server.client[args.db])
+
+    try:
+        results = asyncio.run(run(args, server))
+        if args.mongo != "mongomock":
+            from pymongo import MongoClient
+            MongoClient(args.mongo_url).drop_database(args.db)
+    finally:
+        if mongod:
+            mongod[0].terminate()
+            mongod[0].wait()
+            shutil.rmtree(mongod[1], ignore_errors=True)
+        shutil.rmtree(args.static_dir, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if results["uncovered"]:
+        print(f"warning: routes without a scenario: {', '.join(results['uncovered'])}", file=sys.stderr)
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text(encoding="utf-8")), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: default FastAPI response path vs FastJSONResponse
+
+Encodes a list of N realistic blog post documents the way a list route does:
+  - default: response_model validation + jsonable_encoder + JSONResponse
+  - fast:    FastJSONResponse on the raw documents (orjson when installed)
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--items 100] [--seconds 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+from bson import ObjectId
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from starlette.responses import JSONResponse
+
+import server
+
+
+def make_posts(count: int) -> List[dict]:
+    now = datetime.utcnow()
+    paragraph = "Well-designed relational schemas keep reporting fast and data trustworthy. " * 40
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Database article {i}",
+            "slug": f"database-article-{i}",
+            "excerpt": "How a custom Access database replaces fragile spreadsheets.",
+            "content": f"# Database article {i}\n\n" + "\n\n".join([paragraph] * 5),
+            "category": "Database Strategy",
+            "readTime": "7 min read",
+            "published": True,
+            "publishDate": now - timedelta(days=i),
+            "createdAt": now - timedelta(days=i),
+            "updatedAt": now - timedelta(days=i),
+            "seoTitle": f"Database article {i} | Christopher Merrick",
+            "seoDescription": "Learn when your business needs a proper database.",
+        }
+        for i in range(count)
+    ]
+
+
+def measure(func, seconds: float) -> dict:
+    func()  # warm up
+    iterations, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        func()
+        iterations += 1
+    elapsed = time.perf_counter() - started
+    return {"iterations": iterations, "perSecond": round(iterations / elapsed, 1), "msPerCall": round(elapsed / iterations * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100, help="Documents per response")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Time budget per variant")
+    args = parser.parse_args()
+
+    posts = make_posts(args.items)
+    field = create_response_field(name="Response_get_blog_posts", type_=List[server.BlogPost], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def default_path():
+        docs = [server.serialize_doc(dict(post)) for post in posts]
+        content = loop.run_until_complete(serialize_response(field=field, response_content=docs, is_coroutine=True))
+        return JSONResponse(content).body
+
+    def fast_path():
+        return server.FastJSONResponse(posts).body
+
+    # Both paths must produce the same JSON, except that the fast path omits
+    # model fields the documents do not store instead of emitting null
+    def stored(body):
+        return [{key: value for key, value in item.items() if value is not None} for item in json.loads(body)]
+    assert stored(default_path()) == stored(fast_path()), "fast and default outputs differ"
+
+    results = {
+        "items": args.items,
+        "encoder": "orjson" if server.orjson else "json",
+        "default": measure(default_path, args.seconds),
+        "fast": measure(fast_path, args.seconds),
+    }
+    results["speedup"] = round(results["fast"]["perSecond"] / results["default"]["perSecond"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
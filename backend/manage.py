@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Management commands for the Christopher Merrick Database Consulting API
+
+Usage:
+    python manage.py ensure-indexes
+    python manage.py audit-indexes
+    python manage.py rebuild-rollups [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+    python manage.py publish-static [--output DIR] [--force]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+
+import server
+
+
+async def ensure_indexes(args):
+    """Create all required indexes"""
+    await server.ensure_indexes()
+    for collection_name in server.REQUIRED_INDEXES:
+        indexes = await server.db[collection_name].index_information()
+        print(f"{collection_name}: {', '.join(sorted(indexes))}")
+    return 0
+
+
+async def audit_indexes(args):
+    """Explain every query shape and report collection scans"""
+    report = await server.audit_indexes()
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        for entry in report:
+            flag = "COLLSCAN" if entry["collscan"] else ("SORT" if entry["inMemorySort"] else "ok")
+            print(f"[{flag:8}] {entry['collection']} filter={entry['filter']} sort={entry['sort']} stages={'>'.join(entry['stages'])}")
+    return 1 if any(entry["collscan"] for entry in report) else 0
+
+
+async def rebuild_rollups(args):
+    """Recompute the daily analytics rollups"""
+    days = await server.rebuild_analytics_rollups(args.start, args.end)
+    print(f"Rebuilt {days} daily rollups")
+    return 0
+
+
+async def publish_static(args):
+    """Render public content into the static output directory"""
+    if not (args.output or server.STATIC_OUTPUT_DIR):
+        print("No output directory: pass --output or set STATIC_OUTPUT_DIR", file=sys.stderr)
+        return 2
+    summary = await server.static_publisher.publish(force=args.force, output_dir=args.output)
+    print(f"Wrote {summary['written']} artifacts, removed {summary['removed']}, {summary['unchanged']} unchanged in {summary['durationMs']:.0f}ms")
+    return 0
+
+
+COMMANDS = {
+    "ensure-indexes": ensure_indexes,
+    "audit-indexes": audit_indexes,
+    "rebuild-rollups": rebuild_rollups,
+    "publish-static": publish_static,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("ensure-indexes", help="Create required indexes on all collections")
+
+    audit_parser = subparsers.add_parser("audit-indexes", help="Report query shapes that scan a whole collection")
+    audit_parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+
+    rollup_parser = subparsers.add_parser("rebuild-rollups", help="Recompute daily analytics rollups from the source collections")
+    rollup_parser.add_argument("--start", type=datetime.fromisoformat, help="First day to rebuild (default: all)")
+    rollup_parser.add_argument("--end", type=datetime.fromisoformat, help="Last day to rebuild (default: all)")
+
+    static_parser = subparsers.add_parser("publish-static", help="Pre-generate public content as static files for CDN serving")
+    static_parser.add_argument("--output", help="Output directory (default: STATIC_OUTPUT_DIR)")
+    static_parser.add_argument("--force", action="store_true", help="Rewrite every artifact, not just changed ones")
+
+    args = parser.parse_args()
+    try:
+        return asyncio.run(COMMANDS[args.command](args))
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Run the Christopher Merrick Database Consulting API under uvicorn
+
+Usage:
+    python serve.py [--workers N] [--host HOST] [--port PORT]
+
+With more than one worker, CACHE_SYNC_ENABLED is turned on so the workers'
+caches stay coherent. Startup seeding is serialized through a Mongo lock in
+any mode. Rate limit buckets are per process unless RATE_LIMIT_BACKEND=mongo.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+                        help="Worker processes (default: WEB_CONCURRENCY or 1)")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"), help="Bind address (default: HOST or 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8001")), help="Bind port (default: PORT or 8001)")
+    parser.add_argument("--graceful-timeout", type=float, default=10,
+                        help="Seconds to wait for open connections (e.g. admin event streams) on shutdown")
+    parser.add_argument("--log-level", default="info", help="Uvicorn log level")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1:
+        # Inherited by the worker processes
+        os.environ.setdefault("CACHE_SYNC_ENABLED", "true")
+        if os.environ.get("RATE_LIMIT_BACKEND", "memory") == "memory":
+            print(f"Rate limits are enforced per worker: effective limits are {args.workers}x the configured ones "
+                  "(set RATE_LIMIT_BACKEND=mongo to share them)", file=sys.stderr)
+
+    uvicorn.run(
+        "server:app",
+        app_dir=str(Path(__file__).resolve().parent),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
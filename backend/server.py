@@ -1,271 +1,3328 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response, UploadFile, File, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReplaceOne, InsertOne, UpdateOne, DeleteOne, ReturnDocument, CursorType
+from pymongo import monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError, OperationFailure, PyMongoError
 import os
+import socket
+import asyncio
 import logging
+import threading
+import cProfile
+import pstats
+import inspect
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timedelta
+import secrets
+import time
+import hashlib
+import csv
+import io
+import html
+import re
+import base64
+import gzip
+import zlib
+import json
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 import jwt
 import bcrypt
+from markdown_it import MarkdownIt
 from bson import ObjectId
+from bson.errors import InvalidId
+from bson import json_util
+
+try:
+    import orjson
+except ImportError:  # optional: FastJSONResponse falls back to the stdlib encoder
+    orjson = None
+try:
+    import brotli
+except ImportError:  # optional: static publishing then only writes .gz variants
+    brotli = None
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Optional bearer token required to scrape /metrics
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Requests slower than this are logged with their span tree
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', '1000'))
+SLOW_REQUEST_HISTORY = int(os.environ.get('SLOW_REQUEST_HISTORY', '50'))
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class MetricsRegistry:
+    """Minimal thread-safe Prometheus registry (counters, gauges, histograms).
+
+    Mongo command events arrive on driver threads, hence the lock. Collectors
+    registered with ``add_collector`` are sampled at scrape time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: Dict[str, Dict[str, Any]] = {}
+        self._collectors = []
+
+    def _family(self, name: str, kind: str, help_text: str) -> Dict[str, Any]:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = {"kind": kind, "help": help_text, "samples": {}}
+        return family
+
+    def inc(self, name: str, help_text: str, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            samples = self._family(name, "counter", help_text)["samples"]
+            samples[labels] = samples.get(labels, 0) + amount
+
+    def gauge_add(self, name: str, help_text: str, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            samples = self._family(name, "gauge", help_text)["samples"]
+            samples[labels] = samples.get(labels, 0) + amount
+
+    def observe(self, name: str, help_text: str, labels: tuple, value: float, buckets: tuple = DEFAULT_BUCKETS):
+        with self._lock:
+            samples = self._family(name, "histogram", help_text)["samples"]
+            histogram = samples.get(labels)
+            if histogram is None:
+                histogram = samples[labels] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(histogram["buckets"]):
+                if value <= bound:
+                    histogram["counts"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def add_collector(self, collector):
+        """``collector()`` returns [(name, kind, help, [(labels, value), ...]), ...]"""
+        self._collectors.append(collector)
+
+    @staticmethod
+    def _labels(labels: tuple, extra: tuple = ()) -> str:
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs) + "}"
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            families = {name: {**family, "samples": dict(family["samples"])} for name, family in self._families.items()}
+        for collector in self._collectors:
+            try:
+                for name, kind, help_text, samples in collector():
+                    families[name] = {"kind": kind, "help": help_text, "samples": dict(samples)}
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+
+        for name, family in sorted(families.items()):
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for labels, value in family["samples"].items():
+                if family["kind"] != "histogram":
+                    lines.append(f"{name}{self._labels(labels)} {value}")
+                    continue
+                # observe() increments every bucket the value fits in, so counts are already cumulative
+                for bound, count in zip(value["buckets"], value["counts"]):
+                    lines.append(f"{name}_bucket{self._labels(labels, (('le', bound),))} {count}")
+                lines.append(f"{name}_bucket{self._labels(labels, (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{name}_sum{self._labels(labels)} {value['sum']}")
+                lines.append(f"{name}_count{self._labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records per-collection/per-command Mongo latency, documents and failures"""
+
+    IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "buildInfo", "killCursors"}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[tuple, str] = {}
+
+    @staticmethod
+    def _documents(command_name: str, reply: Dict[str, Any]) -> int:
+        cursor = reply.get("cursor")
+        if isinstance(cursor, dict):
+            return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+        if command_name == "findAndModify":
+            return int(reply.get("lastErrorObject", {}).get("n", 0))
+        return int(reply.get("n", 0))
+
+    def started(self, event):
+        if event.command_name in self.IGNORED_COMMANDS:
+            return
+        target = event.command.get("collection") if event.command_name == "getMore" else event.command.get(event.command_name)
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def _finish(self, event):
+        with self._lock:
+            return self._started.pop((event.connection_id, event.request_id), None)
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        if collection is None:
+            return
+        labels = (("collection", collection), ("command", event.command_name))
+        metrics.observe("mongo_command_duration_seconds", "MongoDB command latency", labels, event.duration_micros / 1e6)
+        metrics.inc("mongo_command_documents_total", "Documents returned or affected by MongoDB commands", labels, self._documents(event.command_name, event.reply))
+
+    def failed(self, event):
+        collection = self._finish(event)
+        if collection is None:
+            return
+        labels = (("collection", collection), ("command", event.command_name))
+        metrics.observe("mongo_command_duration_seconds", "MongoDB command latency", labels, event.duration_micros / 1e6)
+        metrics.inc("mongo_command_failures_total", "Failed MongoDB commands", labels)
+
+mongo_command_metrics = MongoCommandMetrics()
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts, latency and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        method = scope["method"]
+        metrics.gauge_add("http_requests_in_flight", "HTTP requests currently being served", (("method", method),), 1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            # FastAPI puts the matched route on the scope; use its template to keep cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.gauge_add("http_requests_in_flight", "HTTP requests currently being served", (("method", method),), -1)
+            metrics.inc("http_requests_total", "HTTP requests by route and status", (("method", method), ("route", route), ("status", status_code)))
+            metrics.observe("http_request_duration_seconds", "HTTP request latency by route", (("method", method), ("route", route)), elapsed)
+
+# ============================================================================
+# TRACING
+# ============================================================================
+
+class Span:
+    """A timed section of a request; aggregated spans sum repeated calls"""
+
+    __slots__ = ("name", "attrs", "started", "duration", "count", "children")
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.count = 0
+        self.children: List["Span"] = []
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "offsetMs": round((self.started - origin) * 1000, 3),
+            "durationMs": round(self.duration * 1000, 3),
+            "count": self.count,
+            **({"attrs": self.attrs} if self.attrs else {}),
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+    def format(self, origin: float, depth: int = 0) -> str:
+        calls = f" x{self.count}" if self.count > 1 else ""
+        attrs = "".join(f" {key}={value}" for key, value in self.attrs.items())
+        line = f"{'  ' * depth}{self.name}{calls} +{(self.started - origin) * 1000:.1f}ms {self.duration * 1000:.1f}ms{attrs}"
+        return "\n".join([line] + [child.format(origin, depth + 1) for child in self.children])
+
+# Innermost open span of the current request; None outside a traced request
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+@contextmanager
+def span(name: str, aggregate: bool = False, **attrs):
+    """Time the enclosed block as a child of the current span (no-op when untraced)"""
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = None
+    if aggregate:
+        child = next((existing for existing in parent.children if existing.name == name), None)
+    if child is None:
+        child = Span(name, attrs)
+        parent.children.append(child)
+    token = current_span.set(child)
+    started = time.perf_counter()
+    try:
+        yield child
+    finally:
+        child.duration += time.perf_counter() - started
+        child.count += 1
+        current_span.reset(token)
+
+async def _traced(name: str, awaitable):
+    with span(name):
+        return await awaitable
+
+class TracedCursor:
+    """Wraps a Motor cursor so fetching from it is recorded as a span"""
+
+    def __init__(self, cursor, name: str):
+        self._cursor = cursor
+        self._name = name
+
+    def __getattr__(self, attr):
+        value = getattr(self._cursor, attr)
+        if not callable(value):
+            return value
+        def method(*args, **kwargs):
+            result = value(*args, **kwargs)
+            if result is self._cursor:  # chained sort()/skip()/limit()
+                return self
+            if inspect.isawaitable(result) and current_span.get() is not None:
+                return _traced(f"{self._name}.{attr}", result)
+            return result
+        return method
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if current_span.get() is None:
+            return await self._cursor.__anext__()
+        with span(f"{self._name}.iterate", aggregate=True):
+            return await self._cursor.__anext__()
+
+class TracedCollection:
+    """Wraps a Motor collection so each call made during a request becomes a span"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._prefix = f"mongo.{collection.name}"
+
+    def __getattr__(self, attr):
+        value = getattr(self._collection, attr)
+        if not callable(value):
+            return value
+        name = f"{self._prefix}.{attr}"
+        def method(*args, **kwargs):
+            result = value(*args, **kwargs)
+            if hasattr(result, "to_list"):  # find()/aggregate() cursors
+                return TracedCursor(result, name)
+            if inspect.isawaitable(result) and current_span.get() is not None:
+                return _traced(name, result)
+            return result
+        return method
+
+class TracedDatabase:
+    """Database proxy handing out TracedCollection wrappers"""
+
+    def __init__(self, database):
+        self._database = database
+        self._collections: Dict[str, TracedCollection] = {}
+
+    def __getitem__(self, name: str) -> TracedCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = TracedCollection(self._database[name])
+        return collection
+
+    def __getattr__(self, attr):
+        value = getattr(self._database, attr)
+        return self[attr] if hasattr(value, "find") else value
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_request_id_pattern = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+slow_requests: deque = deque(maxlen=SLOW_REQUEST_HISTORY)
+# Long-lived streams that always outlast SLOW_REQUEST_MS
+SLOW_LOG_EXEMPT_ROUTES = {"/api/admin/events"}
+
+class TracingMiddleware:
+    """Assigns request IDs, collects the span tree and logs slow requests.
+
+    Admins can send ``X-Profile: 1`` to run the request under cProfile; the
+    top functions by cumulative time are logged with the request ID. cProfile
+    hooks the whole thread, so the profile also includes whatever other
+    requests ran on the event loop meanwhile. Only one request is profiled at
+    a time; others are served unprofiled with ``X-Profile: busy``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._profiling = False
+
+    @staticmethod
+    def _header(scope, name: bytes) -> Optional[str]:
+        for key, value in scope.get("headers", []):
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    def _should_profile(self, scope) -> bool:
+        if self._header(scope, b"x-profile") != "1":
+            return False
+        authorization = self._header(scope, b"authorization") or ""
+        return authorization.startswith("Bearer ") and verify_token(authorization[7:]) is not None
+
+    def _start_profiler(self):
+        """An enabled profiler, or False when another profile is already running"""
+        if self._profiling:
+            return False
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: another profiling tool owns the interpreter hook
+            return False
+        self._profiling = True
+        return profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = self._header(scope, b"x-request-id")
+        if not request_id or not _request_id_pattern.match(request_id):
+            request_id = uuid.uuid4().hex
+        profiler = self._start_profiler() if self._should_profile(scope) else None
+        profile_busy = profiler is False
+        status_code = 500
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                extra = [(b"x-request-id", request_id.encode("latin-1"))]
+                if profile_busy:
+                    extra.append((b"x-profile", b"busy"))
+                message["headers"] = list(message.get("headers", [])) + extra
+            await send(message)
+        
+        root = Span(f"{scope['method']} {scope['path']}")
+        token = current_span.set(root)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if profiler:
+                profiler.disable()
+                self._profiling = False
+            current_span.reset(token)
+            root.duration = time.perf_counter() - root.started
+            root.count = 1
+            route = getattr(scope.get("route"), "path", "unmatched")
+            if root.duration * 1000 >= SLOW_REQUEST_MS and route not in SLOW_LOG_EXEMPT_ROUTES:
+                slow_requests.append({"requestId": request_id, "route": route, "status": status_code, "at": utc_now(), **root.to_dict(root.started)})
+                logger.warning(f"Slow request {request_id} {route} {status_code} {root.duration * 1000:.1f}ms\n{root.format(root.started)}")
+            if profiler:
+                output = io.StringIO()
+                pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(25)
+                logger.info(f"Profile for request {request_id} {route} (includes any requests served concurrently):\n{output.getvalue()}")
+
+# MongoDB connection settings; unset values keep the driver defaults
+def _env_int(name: str, default: Optional[int] = None) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+MONGO_MAX_POOL_SIZE = _env_int('MONGO_MAX_POOL_SIZE', 100)
+MONGO_MIN_POOL_SIZE = _env_int('MONGO_MIN_POOL_SIZE', 0)
+MONGO_MAX_IDLE_TIME_MS = _env_int('MONGO_MAX_IDLE_TIME_MS')
+MONGO_SERVER_SELECTION_TIMEOUT_MS = _env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)
+MONGO_CONNECT_TIMEOUT_MS = _env_int('MONGO_CONNECT_TIMEOUT_MS', 5000)
+MONGO_SOCKET_TIMEOUT_MS = _env_int('MONGO_SOCKET_TIMEOUT_MS')
+MONGO_WAIT_QUEUE_TIMEOUT_MS = _env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS')
+# Connections opened at startup so the first requests don't pay for the handshake
+MONGO_WARMUP_CONNECTIONS = _env_int('MONGO_WARMUP_CONNECTIONS', max(MONGO_MIN_POOL_SIZE, 4))
+# Read preference for public content reads (e.g. secondaryPreferred); admin
+# reads and all writes always go to the primary
+MONGO_PUBLIC_READ_PREFERENCE = os.environ.get('MONGO_PUBLIC_READ_PREFERENCE', 'primary')
+MONGO_PUBLIC_MAX_STALENESS_SECONDS = _env_int('MONGO_PUBLIC_MAX_STALENESS_SECONDS', -1)
+# After an admin write, public reads of the changed content go to the primary
+# for this long, so a lagging secondary can't put pre-write data in the cache
+MONGO_PUBLIC_PRIMARY_AFTER_WRITE_SECONDS = float(os.environ.get(
+    'MONGO_PUBLIC_PRIMARY_AFTER_WRITE_SECONDS',
+    str(MONGO_PUBLIC_MAX_STALENESS_SECONDS if MONGO_PUBLIC_MAX_STALENESS_SECONDS > 0 else 30)
+))
+
+def mongo_client_options() -> Dict[str, Any]:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+def public_read_preference():
+    mode = read_pref_mode_from_name(MONGO_PUBLIC_READ_PREFERENCE)
+    return make_read_preference(mode, None, MONGO_PUBLIC_MAX_STALENESS_SECONDS) if mode else make_read_preference(mode, None)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Tracks open, checked-out and waiting connections per server"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.servers: Dict[str, Dict[str, int]] = {}
+
+    def _update(self, event, **deltas):
+        address = "%s:%s" % event.address
+        with self._lock:
+            server = self.servers.setdefault(address, {"open": 0, "checkedOut": 0, "waiting": 0, "checkoutFailures": 0, "cleared": 0})
+            for key, delta in deltas.items():
+                server[key] = max(0, server[key] + delta)
+
+    def pool_created(self, event): self._update(event)
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): self._update(event, cleared=1)
+    def pool_closed(self, event): pass
+    def connection_created(self, event): self._update(event, open=1)
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): self._update(event, open=-1)
+    def connection_check_out_started(self, event): self._update(event, waiting=1)
+    def connection_check_out_failed(self, event): self._update(event, waiting=-1, checkoutFailures=1)
+    def connection_checked_out(self, event): self._update(event, waiting=-1, checkedOut=1)
+    def connection_checked_in(self, event): self._update(event, checkedOut=-1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            servers = {address: dict(server) for address, server in self.servers.items()}
+        for server in servers.values():
+            server["utilization"] = round(server["checkedOut"] / MONGO_MAX_POOL_SIZE, 4) if MONGO_MAX_POOL_SIZE else 0.0
+        return {"maxPoolSize": MONGO_MAX_POOL_SIZE, "minPoolSize": MONGO_MIN_POOL_SIZE, "servers": servers}
+
+mongo_pool_metrics = MongoPoolMetrics()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_command_metrics, mongo_pool_metrics], **mongo_client_options())
+db = TracedDatabase(client[os.environ['DB_NAME']])
+# Public read routes; may be served by secondaries when configured
+public_db = TracedDatabase(client.get_database(os.environ['DB_NAME'], read_preference=public_read_preference()))
+
+# JWT Configuration
+JWT_SECRET = os.environ.get('JWT_SECRET', 'christopher-merrick-secret-key-2024')
+JWT_ALGORITHM = "HS256"
+JWT_EXPIRATION_HOURS = 24
+
+# Public content cache configuration
+CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS', '60'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '512'))
+# Blog search results get their own small cache so arbitrary queries can't
+# evict the list/post entries
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', '128'))
+
+# Verified token / admin principal cache configuration
+AUTH_CACHE_TTL_SECONDS = float(os.environ.get('AUTH_CACHE_TTL_SECONDS', '30'))
+AUTH_CACHE_MAX_ENTRIES = int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', '1024'))
+
+# Password hashing configuration
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '16'))
+
+# Write-behind ingestion of contact form and newsletter submissions
+INGEST_WRITE_BEHIND = os.environ.get('INGEST_WRITE_BEHIND', 'true').lower() in ('1', 'true', 'yes')
+INGEST_QUEUE_SIZE = int(os.environ.get('INGEST_QUEUE_SIZE', '10000'))
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', '500'))
+INGEST_FLUSH_INTERVAL_SECONDS = float(os.environ.get('INGEST_FLUSH_INTERVAL_SECONDS', '0.2'))
+INGEST_SPOOL_PATH = os.environ.get('INGEST_SPOOL_PATH')  # optional crash-safety journal
+
+# Opt-in fast serialization for list routes (see FastJSONResponse)
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() in ('1', 'true', 'yes')
+
+# How often the analytics counters are reconciled against real counts
+ANALYTICS_RECONCILE_SECONDS = float(os.environ.get('ANALYTICS_RECONCILE_SECONDS', '300'))
+
+# Rate limits for public POST endpoints, as "<count>/<second|minute|hour>";
+# an empty value disables that limit. "mongo" shares buckets across workers.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_TRUST_FORWARDED = os.environ.get('RATE_LIMIT_TRUST_FORWARDED', 'false').lower() in ('1', 'true', 'yes')
+# Proxies in front of the app that append to X-Forwarded-For; the client is
+# the entry this many hops from the right (anything further left is spoofable)
+RATE_LIMIT_TRUSTED_PROXY_HOPS = max(1, int(os.environ.get('RATE_LIMIT_TRUSTED_PROXY_HOPS', '1')))
+RATE_LIMIT_CONTACT_PER_IP = os.environ.get('RATE_LIMIT_CONTACT_PER_IP', '5/minute')
+RATE_LIMIT_CONTACT_GLOBAL = os.environ.get('RATE_LIMIT_CONTACT_GLOBAL', '20/second')
+RATE_LIMIT_NEWSLETTER_PER_IP = os.environ.get('RATE_LIMIT_NEWSLETTER_PER_IP', '5/minute')
+RATE_LIMIT_NEWSLETTER_GLOBAL = os.environ.get('RATE_LIMIT_NEWSLETTER_GLOBAL', '20/second')
+RATE_LIMIT_LOGIN_PER_IP = os.environ.get('RATE_LIMIT_LOGIN_PER_IP', '10/minute')
+RATE_LIMIT_LOGIN_GLOBAL = os.environ.get('RATE_LIMIT_LOGIN_GLOBAL', '5/second')
+
+# Static site publishing; the admin write hook is enabled when STATIC_OUTPUT_DIR is set
+STATIC_OUTPUT_DIR = os.environ.get('STATIC_OUTPUT_DIR')
+STATIC_PUBLISH_DELAY_SECONDS = float(os.environ.get('STATIC_PUBLISH_DELAY_SECONDS', '2'))
+SITE_URL = os.environ.get('SITE_URL', 'https://christophermerrick.co.uk').rstrip('/')
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+
+# Load shedding: cap on concurrent requests, and the event loop lag / ingestion
+# queue fill above which the rate-limited endpoints answer 503
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '512'))
+ADMISSION_MAX_LOOP_LAG_MS = float(os.environ.get('ADMISSION_MAX_LOOP_LAG_MS', '250'))
+ADMISSION_MAX_QUEUE_FILL = float(os.environ.get('ADMISSION_MAX_QUEUE_FILL', '0.9'))
+
+# Admin live updates (/api/admin/events): polling interval used when the server
+# has no change streams, keep-alive interval and per-client buffer
+ADMIN_EVENTS_POLL_SECONDS = float(os.environ.get('ADMIN_EVENTS_POLL_SECONDS', '2'))
+ADMIN_EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('ADMIN_EVENTS_HEARTBEAT_SECONDS', '15'))
+ADMIN_EVENTS_QUEUE_SIZE = int(os.environ.get('ADMIN_EVENTS_QUEUE_SIZE', '256'))
+# Lifetime of the single-use tickets EventSource clients open the stream with
+STREAM_TICKET_TTL_SECONDS = float(os.environ.get('STREAM_TICKET_TTL_SECONDS', '30'))
+
+# Multi-worker mode (see serve.py): cache invalidations are broadcast to the
+# other workers, and startup seeding waits for the seed lock
+CACHE_SYNC_ENABLED = os.environ.get('CACHE_SYNC_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+CACHE_SYNC_MAX_EVENTS = int(os.environ.get('CACHE_SYNC_MAX_EVENTS', '1000'))
+STARTUP_LOCK_LEASE_SECONDS = float(os.environ.get('STARTUP_LOCK_LEASE_SECONDS', '30'))
+
+# Create the main app
+app = FastAPI(title="Christopher Merrick Database Consulting API")
+
+# Security
+security = HTTPBearer()
+stream_security = HTTPBearer(auto_error=False)
+
+# Create a router with the /api prefix
+api_router = APIRouter(prefix="/api")
+
+# Helper function to convert ObjectId to string
+def serialize_doc(doc):
+    with span("serialize_doc", aggregate=True):
+        if doc and "_id" in doc:
+            doc["_id"] = str(doc["_id"])
+        return doc
+
+def _json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_json(content: Any) -> bytes:
+    """Compact JSON for raw Mongo documents, using orjson when installed"""
+    with span("encode_json", aggregate=True):
+        if orjson is not None:
+            return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+class FastJSONResponse(JSONResponse):
+    """Encodes raw Mongo documents directly with orjson (ObjectId and datetime
+    handled natively), skipping response_model re-validation and jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+def list_response(response: Response, docs: List[Dict[str, Any]]):
+    """Return ``docs`` through FastJSONResponse when FAST_JSON_RESPONSES is on,
+    otherwise serialized for the route's response_model"""
+    if not FAST_JSON_RESPONSES:
+        return [serialize_doc(doc) for doc in docs]
+    # A returned Response bypasses the injected one, so carry its headers over
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return FastJSONResponse(docs, headers=headers)
+
+# Current UTC time truncated to the millisecond precision MongoDB stores, so
+# documents built in memory match what a later read returns
+def utc_now() -> datetime:
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+# ============================================================================
+# MODELS
+# ============================================================================
+
+class BlogPost(BaseModel):
+    id: Optional[str] = Field(None, alias="_id")
+    title: str
+    slug: str
+    excerpt: str
+    content: str
+    category: str
+    readTime: str = "5 min read"
+    published: bool = True
+    publishDate: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+    seoTitle: Optional[str] = None
+    seoDescription: Optional[str] = None
+    contentHtml: Optional[str] = None
+    toc: Optional[List[Dict[str, Any]]] = None
+
+class BlogPostSummary(BaseModel):
+    """Listing card view of a blog post; only the projected fields are returned"""
+    id: Optional[str] = Field(None, alias="_id")
+    title: Optional[str] = None
+    slug: Optional[str] = None
+    excerpt: Optional[str] = None
+    category: Optional[str] = None
+    readTime: Optional[str] = None
+    publishDate: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+    seoTitle: Optional[str] = None
+    seoDescription: Optional[str] = None
+
+# Fixed /api/blog/<name> routes, matched before /api/blog/{slug}; a post with
+# one of these slugs could never be fetched
+RESERVED_BLOG_SLUGS = {"summaries", "search"}
+
+def check_blog_slug(slug: str):
+    if slug in RESERVED_BLOG_SLUGS:
+        raise HTTPException(status_code=400, detail=f"The slug {slug!r} is reserved")
+
+class BlogPostCreate(BaseModel):
+    title: str
+    slug: str
+    excerpt: str
+    content: str
+    category: str
+    readTime: Optional[str] = None  # computed from the content when omitted
+    published: bool = True
+    seoTitle: Optional[str] = None
+    seoDescription: Optional[str] = None
+
+class Testimonial(BaseModel):
+    id: Optional[str] = Field(None, alias="_id")
+    name: str
+    company: str
+    location: str
+    text: str
+    rating: int = Field(ge=1, le=5)
+    published: bool = True
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+
+class TestimonialCreate(BaseModel):
+    name: str
+    company: str
+    location: str
+    text: str
+    rating: int = Field(ge=1, le=5)
+    published: bool = True
+
+class ContactSubmission(BaseModel):
+    id: Optional[str] = Field(None, alias="_id")
+    name: str
+    email: EmailStr
+    phone: Optional[str] = None
+    company: Optional[str] = None
+    consultationType: Optional[str] = None
+    message: str
+    status: str = "new"  # new, contacted, completed
+    submittedAt: datetime = Field(default_factory=datetime.utcnow)
+    notes: Optional[str] = None
+
+class ContactSubmissionCreate(BaseModel):
+    name: str
+    email: EmailStr
+    phone: Optional[str] = None
+    company: Optional[str] = None
+    consultationType: Optional[str] = None
+    message: str
+
+class Service(BaseModel):
+    id: Optional[str] = Field(None, alias="_id")
+    title: str
+    description: str
+    icon: str
+    features: List[str]
+    pricing: Optional[Dict[str, str]] = None
+    published: bool = True
+    order: int = 0
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+
+class ServiceUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    icon: Optional[str] = None
+    features: Optional[List[str]] = None
+    pricing: Optional[Dict[str, str]] = None
+    published: Optional[bool] = None
+    order: Optional[int] = None
+
+class AdminUser(BaseModel):
+    id: Optional[str] = Field(None, alias="_id")
+    email: EmailStr
+    passwordHash: str
+    name: str
+    role: str = "admin"
+    lastLogin: Optional[datetime] = None
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+
+class AdminLogin(BaseModel):
+    email: EmailStr
+    password: str
+
+class NewsletterSubscription(BaseModel):
+    email: EmailStr
+    subscribedAt: datetime = Field(default_factory=datetime.utcnow)
+
+class BulkContactStatusUpdate(BaseModel):
+    ids: List[str]
+    status: str
+    notes: Optional[str] = None
+
+class BulkPublishAction(BaseModel):
+    ids: List[str]
+    action: str  # publish, unpublish, delete
+
+# ============================================================================
+# DATABASE INDEXES
+# ============================================================================
+
+# Indexes required by the query shapes issued from the routes below
+REQUIRED_INDEXES: Dict[str, List[IndexModel]] = {
+    "blog_posts": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("published", ASCENDING), ("publishDate", DESCENDING), ("_id", DESCENDING)], name="published_publishDate"),
+        IndexModel([("createdAt", DESCENDING), ("_id", DESCENDING)], name="createdAt"),
+        IndexModel(
+            [("title", TEXT), ("excerpt", TEXT), ("content", TEXT), ("category", TEXT)],
+            name="blog_text",
+            weights={"title": 10, "category": 5, "excerpt": 3, "content": 1}
+        ),
+    ],
+    "testimonials": [
+        IndexModel([("published", ASCENDING), ("createdAt", DESCENDING)], name="published_createdAt"),
+        IndexModel([("createdAt", DESCENDING)], name="createdAt"),
+    ],
+    "services": [
+        IndexModel([("published", ASCENDING), ("order", ASCENDING)], name="published_order"),
+        IndexModel([("order", ASCENDING)], name="order"),
+    ],
+    "contact_submissions": [
+        IndexModel([("submittedAt", DESCENDING), ("_id", DESCENDING)], name="submittedAt"),
+        IndexModel([("status", ASCENDING), ("submittedAt", DESCENDING)], name="status_submittedAt"),
+        IndexModel([("updatedAt", ASCENDING)], name="updatedAt", sparse=True),
+    ],
+    "newsletter_subscriptions": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("subscribedAt", ASCENDING)], name="subscribedAt"),
+    ],
+    "admin_users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "rate_limits": [
+        IndexModel([("expiresAt", ASCENDING)], name="expiresAt_ttl", expireAfterSeconds=0),
+    ],
+    "stream_tickets": [
+        IndexModel([("expiresAt", ASCENDING)], name="expiresAt_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Every (collection, filter, sort) the routes issue, used by the index audit
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"collection": "blog_posts", "filter": {"published": True}, "sort": {"publishDate": -1, "_id": -1}},
+    {"collection": "blog_posts", "filter": {"slug": "example-slug", "published": True}},
+    {"collection": "blog_posts", "filter": {}, "sort": {"createdAt": -1, "_id": -1}},
+    {"collection": "blog_posts", "filter": {"$text": {"$search": "database"}, "published": True}},
+    {"collection": "testimonials", "filter": {"published": True}, "sort": {"createdAt": -1}},
+    {"collection": "testimonials", "filter": {}, "sort": {"createdAt": -1}},
+    {"collection": "services", "filter": {"published": True}, "sort": {"order": 1}},
+    {"collection": "services", "filter": {}, "sort": {"order": 1}},
+    {"collection": "contact_submissions", "filter": {}, "sort": {"submittedAt": -1, "_id": -1}},
+    {"collection": "contact_submissions", "filter": {"status": "new"}},
+    {"collection": "newsletter_subscriptions", "filter": {"email": "someone@example.com"}},
+    {"collection": "newsletter_subscriptions", "filter": {"subscribedAt": {"$gte": datetime(2024, 1, 1)}}, "sort": {"subscribedAt": 1}},
+    {"collection": "contact_submissions", "filter": {"status": "new", "submittedAt": {"$gte": datetime(2024, 1, 1)}}, "sort": {"submittedAt": 1}},
+    {"collection": "admin_users", "filter": {"email": "admin@example.com"}},
+    {"collection": "contact_submissions", "filter": {"submittedAt": {"$gte": datetime(2024, 1, 1)}}, "sort": {"submittedAt": 1}},
+    {"collection": "contact_submissions", "filter": {"updatedAt": {"$gte": datetime(2024, 1, 1)}}, "sort": {"updatedAt": 1}},
+]
+
+async def ensure_indexes() -> List[str]:
+    """Create the required indexes; safe to run on every startup.
+
+    Returns the collections whose indexes could not all be created.
+    """
+    failed = []
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        try:
+            await db[collection_name].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. duplicate data blocking a unique index, or a conflicting existing index
+            logger.error(f"Could not create indexes on {collection_name}: {e}")
+            failed.append(collection_name)
+    return failed
+
+def _plan_stages(plan) -> List[str]:
+    if isinstance(plan, dict):
+        stages = [plan["stage"]] if "stage" in plan else []
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+        return stages
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    return []
+
+async def audit_indexes() -> List[Dict[str, Any]]:
+    """Explain every known query shape and report collection scans and in-memory sorts"""
+    report = []
+    for shape in QUERY_SHAPES:
+        find_command = {"find": shape["collection"], "filter": shape["filter"]}
+        if shape.get("sort"):
+            find_command["sort"] = shape["sort"]
+        explain = await db.command({"explain": find_command, "verbosity": "queryPlanner"})
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        report.append({
+            "collection": shape["collection"],
+            "filter": shape["filter"],
+            "sort": shape.get("sort"),
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "inMemorySort": "SORT" in stages,
+        })
+    return report
+
+# ============================================================================
+# CACHING
+# ============================================================================
+
+class ResponseCache:
+    """TTL + LRU cache for public read responses, grouped by namespace.
+
+    Entries are keyed by ``(namespace, key)``. Admin write routes call
+    ``invalidate`` with the namespace they touched, which drops its entries
+    and bumps the namespace version. A value loaded before an invalidation
+    is stale, so ``set`` drops it when given the version read before loading.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.versions: Dict[str, int] = {}
+        self.invalidated_at: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, namespace: str, key: Any = None):
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[(namespace, key)]
+            self.misses += 1
+            return None
+        self._entries.move_to_end((namespace, key))
+        self.hits += 1
+        return value
+
+    def version(self, namespace: str) -> int:
+        return self.versions.get(namespace, 0)
+
+    def set(self, namespace: str, key: Any, value: Any, version: Optional[int] = None):
+        if version is not None and version != self.version(namespace):
+            return
+        self._entries[(namespace, key)] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            self.versions[namespace] = self.versions.get(namespace, 0) + 1
+            self.invalidated_at[namespace] = time.monotonic()
+            self.invalidations += 1
+        for cache_key in [k for k in self._entries if k[0] in namespaces]:
+            del self._entries[cache_key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "versions": dict(self.versions),
+        }
+
+response_cache = ResponseCache(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
+search_cache = ResponseCache(max_entries=SEARCH_CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
+
+def public_reads(namespace: str):
+    """Database for public reads of ``namespace``: ``public_db``, or the primary
+    shortly after an admin write so the reload sees that write"""
+    invalidated_at = response_cache.invalidated_at.get(namespace)
+    if invalidated_at is not None and time.monotonic() - invalidated_at < MONGO_PUBLIC_PRIMARY_AFTER_WRITE_SECONDS:
+        return db
+    return public_db
+
+async def cached_response(namespace: str, key: Any, loader, cache: ResponseCache = response_cache):
+    """Return the cached value for ``(namespace, key)`` or load and store it.
+
+    The loaded value is not stored if the namespace was invalidated while the
+    loader ran, since it may predate the write.
+    """
+    value = cache.get(namespace, key)
+    if value is None:
+        version = cache.version(namespace)
+        value = await loader()
+        if value is not None:
+            cache.set(namespace, key, value, version=version)
+    return value
+
+# ============================================================================
+# REPOSITORIES
+# ============================================================================
+
+class Repository:
+    """Single-round-trip writes that return the stored document.
+
+    Inserts build the document (``_id`` and timestamps) client-side and return
+    it without re-reading; updates use find_one_and_update so the returned
+    document is the one this write produced, never a concurrent edit.
+    """
+
+    def __init__(self, collection_name: str, insert_timestamps: tuple = ("createdAt", "updatedAt")):
+        self.collection_name = collection_name
+        self.insert_timestamps = insert_timestamps
+
+    @property
+    def collection(self):
+        return db[self.collection_name]
+
+    @staticmethod
+    def object_id(raw_id: str) -> Optional[ObjectId]:
+        try:
+            return ObjectId(raw_id)
+        except (InvalidId, TypeError):
+            return None
+
+    def new_document(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        now = utc_now()
+        return {**data, "_id": ObjectId(), **{field: now for field in self.insert_timestamps}}
+
+    async def insert(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        document = self.new_document(data)
+        await self.collection.insert_one(document)
+        return document
+
+    async def update(self, raw_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """$set ``changes`` (plus updatedAt) and return the updated document, or None"""
+        object_id = self.object_id(raw_id)
+        if object_id is None:
+            return None
+        return await self.collection.find_one_and_update(
+            {"_id": object_id},
+            {"$set": {**changes, "updatedAt": utc_now()}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def update_with_previous(self, raw_id: str, changes: Dict[str, Any]):
+        """Like ``update`` but returns ``(previous, updated)``.
+
+        The write returns the pre-image; the updated document is that image
+        with the same $set applied, which is exact because the update is atomic.
+        """
+        object_id = self.object_id(raw_id)
+        if object_id is None:
+            return None, None
+        changes = {**changes, "updatedAt": utc_now()}
+        previous = await self.collection.find_one_and_update({"_id": object_id}, {"$set": changes})
+        if previous is None:
+            return None, None
+        return previous, {**previous, **changes}
+
+    async def delete(self, raw_id: str, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """Delete by id and return the removed document, or None"""
+        object_id = self.object_id(raw_id)
+        if object_id is None:
+            return None
+        return await self.collection.find_one_and_delete({"_id": object_id}, projection=projection)
+
+blog_posts_repository = Repository("blog_posts", insert_timestamps=("createdAt", "updatedAt", "publishDate"))
+testimonials_repository = Repository("testimonials")
+services_repository = Repository("services", insert_timestamps=("updatedAt",))
+
+# ============================================================================
+# AUTHENTICATION
+# ============================================================================
+
+def create_access_token(data: dict):
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+# Decoded tokens are cached under "tokens"; admin principals under
+# "admin:<email>" keyed by token, so one admin's sessions can be dropped at once
+auth_cache = ResponseCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl_seconds=AUTH_CACHE_TTL_SECONDS)
+_pending_admin_lookups: Dict[str, asyncio.Future] = {}
+
+def verify_token(token: str):
+    payload = auth_cache.get("tokens", token)
+    if payload is not None:
+        return payload if payload.get("exp", 0) > time.time() else None
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    auth_cache.set("tokens", token, payload)
+    return payload
+
+async def invalidate_admin(email: str):
+    """Drop cached principals for an admin user after it changes, on every worker"""
+    auth_cache.invalidate(f"admin:{email}")
+    await cache_sync.publish("auth", f"admin:{email}")
+
+async def _find_admin(email: str):
+    # Concurrent requests for the same admin share a single lookup
+    lookup = _pending_admin_lookups.get(email)
+    if lookup is None:
+        lookup = asyncio.ensure_future(db.admin_users.find_one({"email": email}))
+        _pending_admin_lookups[email] = lookup
+        lookup.add_done_callback(lambda _: _pending_admin_lookups.pop(email, None))
+    return await asyncio.shield(lookup)
+
+async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    payload = verify_token(token)
+    
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    
+    email = payload.get("sub")
+    admin = auth_cache.get(f"admin:{email}", token)
+    if admin is not None:
+        return admin
+    
+    version = auth_cache.version(f"admin:{email}")
+    admin = await _find_admin(email)
+    if not admin:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Admin user not found"
+        )
+    
+    admin = serialize_doc(dict(admin))
+    auth_cache.set(f"admin:{email}", token, admin, version=version)
+    return admin
+
+def _stream_ticket_id(ticket: str) -> str:
+    # Only the hash is stored, so the collection holds nothing replayable
+    return hashlib.sha256(ticket.encode("utf-8")).hexdigest()
+
+async def issue_stream_ticket(email: str) -> str:
+    """Single-use ticket that opens one event stream within STREAM_TICKET_TTL_SECONDS"""
+    ticket = secrets.token_urlsafe(32)
+    await db.stream_tickets.insert_one({
+        "_id": _stream_ticket_id(ticket),
+        "email": email,
+        "expiresAt": utc_now() + timedelta(seconds=STREAM_TICKET_TTL_SECONDS),
+    })
+    return ticket
+
+async def get_current_admin_for_stream(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(stream_security)):
+    """get_current_admin that also accepts a ?ticket= from issue_stream_ticket, since
+    EventSource can't send headers; bearer tokens are never read from the URL"""
+    if credentials:
+        return await get_current_admin(credentials)
+    ticket = request.query_params.get("ticket")
+    if not ticket:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
+    issued = await db.stream_tickets.find_one_and_delete({"_id": _stream_ticket_id(ticket), "expiresAt": {"$gt": utc_now()}})
+    admin = await _find_admin(issued["email"]) if issued else None
+    if not admin:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired stream ticket")
+    return serialize_doc(dict(admin))
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+def verify_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated, size-limited thread pool off the event loop.
+
+    Calls beyond ``max_pending`` (running + queued) are rejected with a 503
+    instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in attempts in progress, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        try:
+            with span(f"bcrypt.{func.__name__}", queued=max(0, self.pending - self.workers)):
+                return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "rounds": BCRYPT_ROUNDS,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "peakPending": self.peak_pending,
+            "maxPending": self.max_pending,
+            "saturation": round(self.pending / self.max_pending, 4) if self.max_pending else 0.0,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+password_hasher = PasswordHasher(workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING)
+
+# ============================================================================
+# WORKER COORDINATION
+# ============================================================================
+
+class MongoLock:
+    """Lease-based lock shared by every worker process through the locks collection.
+
+    Used as ``async with MongoLock(name):`` it waits for the lock (up to
+    ``timeout``, by default indefinitely) and renews the lease in the
+    background while held, so long-running work keeps it; a worker that dies
+    holding it only blocks the others until the lease expires. ``try_acquire``
+    takes or renews the lease without waiting, to skip work another worker is
+    already doing.
+    """
+
+    def __init__(self, name: str, lease_seconds: float = 60, timeout: Optional[float] = None):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.timeout = timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def try_acquire(self) -> bool:
+        """Take or renew the lease; False while another owner holds it"""
+        now = utc_now()
+        try:
+            await db.locks.update_one(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expiresAt": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "acquiredAt": now, "expiresAt": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # The lock document exists and the filter didn't match: held elsewhere
+            return False
+
+    async def acquire(self):
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        delay = 0.05
+        while not await self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for lock {self.name!r}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    async def release(self):
+        await db.locks.delete_one({"_id": self.name, "owner": self.owner})
+
+    async def _keep_alive(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self.try_acquire():
+                    logger.error(f"Lost lock {self.name!r}: the lease expired and another worker took it")
+                    return
+            except PyMongoError as e:
+                logger.error(f"Could not renew lock {self.name!r}, retrying: {e}")
+
+    async def __aenter__(self):
+        await self.acquire()
+        self._heartbeat = asyncio.create_task(self._keep_alive())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._heartbeat.cancel()
+        await self.release()
+
+class CacheSync:
+    """Cross-worker cache invalidation over the capped cache_events collection.
+
+    Each invalidation is inserted as an event, and every worker tails the
+    collection and applies the events published by the other workers to its
+    own caches. Unlike change streams, tailable cursors on a capped collection
+    also work against a standalone server.
+    """
+
+    def __init__(self, enabled: bool, max_events: int):
+        self.enabled = enabled
+        self.max_events = max_events
+        self.origin: Optional[str] = None
+        self.caches = {"responses": (response_cache, search_cache), "auth": (auth_cache,)}
+        self._task: Optional[asyncio.Task] = None
+        self._resume_at: Optional[datetime] = None
+        self._seen: deque = deque(maxlen=max_events)
+        self.published = 0
+        self.applied = 0
+        self.failures = 0
+
+    async def ensure_collection(self):
+        try:
+            await db.create_collection("cache_events", capped=True, size=self.max_events * 256, max=self.max_events)
+        except CollectionInvalid:
+            pass
+        except OperationFailure as e:
+            if e.code != 48:  # NamespaceExists: another worker created it first
+                raise
+
+    async def start(self):
+        if not self.enabled:
+            return
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Caches start empty, so only events from now on matter
+        self._resume_at = utc_now()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def publish(self, cache: str, *namespaces: str):
+        """Tell the other workers to drop these namespaces from the named cache"""
+        if not self.origin or not namespaces:
+            return
+        try:
+            await db.cache_events.insert_one({"cache": cache, "namespaces": list(namespaces), "origin": self.origin, "at": utc_now()})
+            self.published += 1
+        except Exception as e:
+            # Other workers fall back to their cache TTL
+            self.failures += 1
+            logger.error(f"Failed to publish cache invalidation for {cache}:{','.join(namespaces)}: {e}")
+
+    async def _run(self):
+        while True:
+            cursor = db.cache_events.find({"at": {"$gte": self._resume_at}}, cursor_type=CursorType.TAILABLE_AWAIT)
+            try:
+                async for event in cursor:
+                    self._apply(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Cache event subscription failed, reconnecting: {e}")
+            # The cursor dies when nothing matched yet; re-open after a pause
+            await asyncio.sleep(1)
+
+    def _apply(self, event: Dict[str, Any]):
+        # Re-opened cursors overlap by a little to cover clock skew between workers
+        if event["_id"] in self._seen:
+            return
+        self._seen.append(event["_id"])
+        self._resume_at = max(self._resume_at, event["at"] - timedelta(seconds=5))
+        caches = self.caches.get(event.get("cache"))
+        if caches and event.get("origin") != self.origin:
+            for cache in caches:
+                cache.invalidate(*event.get("namespaces", []))
+            self.applied += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "origin": self.origin,
+            "published": self.published,
+            "applied": self.applied,
+            "failures": self.failures,
+        }
+
+cache_sync = CacheSync(enabled=CACHE_SYNC_ENABLED, max_events=CACHE_SYNC_MAX_EVENTS)
+
+# ============================================================================
+# CONDITIONAL GET
+# ============================================================================
+
+async def content_validators(namespace: str, key: Any, collection, query: Dict[str, Any]):
+    """Return (etag, last_modified, count) for the documents matching ``query``.
+
+    Built from a count + max(updatedAt) aggregate rather than the payload. The
+    aggregate is cached once per (collection, query) in the namespace, so it
+    is dropped by the same admin invalidations and shared by every page of a
+    listing; ``key`` only varies the ETag.
+    """
+    async def load():
+        rows = await collection.aggregate([
+            {"$match": query},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "lastModified": {"$max": "$updatedAt"}}},
+        ]).to_list(1)
+        return (rows[0]["count"], rows[0]["lastModified"]) if rows else (0, None)
+    
+    query_key = (collection.name, json.dumps(query, sort_keys=True, default=str))
+    count, last_modified = await cached_response(namespace, ("validator", query_key), load)
+    digest = hashlib.sha1(
+        f"{namespace}:{key!r}:{count}:{last_modified.isoformat() if last_modified else ''}".encode('utf-8')
+    ).hexdigest()
+    return f'"{digest}"', last_modified, count
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Compressed responses carry per-encoding ETags; only the variant this
+        # request would be sent in validates (besides the identity one)
+        accepted = {etag, f"W/{etag}"}
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", "")) if COMPRESSION_ENABLED else None
+        if encoding:
+            accepted.add(encoded_etag(etag, encoding))
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or any(tag in accepted for tag in candidates)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+async def conditional_get(request: Request, response: Response, namespace: str, key: Any, collection, query: Dict[str, Any]):
+    """Set ETag/Last-Modified on ``response`` and return a 304 if the client copy is fresh.
+
+    Returns None when the full body should be sent.
+    """
+    etag, last_modified, count = await content_validators(namespace, key, collection, query)
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = _http_date(last_modified)
+    
+    if count and _is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return None
+
+# ============================================================================
+# MARKDOWN RENDERING
+# ============================================================================
+
+READING_WORDS_PER_MINUTE = 200
+
+# Raw HTML in markdown is escaped and unsafe link schemes are rejected, so the
+# rendered output is safe to inject as-is
+_markdown = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+
+# Rendered output keyed by content hash, shared by every post with the same body
+render_cache = ResponseCache(max_entries=256, ttl_seconds=24 * 3600)
+
+# Stored alongside the markdown but omitted from list responses
+RENDERED_FIELDS = ("contentHtml", "toc", "contentHash")
+
+def _heading_anchor(title: str, used: Dict[str, int]) -> str:
+    anchor = re.sub(r"[^\w\s-]", "", title.lower()).strip()
+    anchor = re.sub(r"[\s_]+", "-", anchor) or "section"
+    used[anchor] = used.get(anchor, 0) + 1
+    return anchor if used[anchor] == 1 else f"{anchor}-{used[anchor] - 1}"
+
+def render_markdown(content: str) -> Dict[str, Any]:
+    """Render markdown to sanitized HTML with heading anchors, a table of contents and reading time"""
+    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    rendered = render_cache.get("markdown", content_hash)
+    if rendered is not None:
+        return rendered
+    
+    tokens = _markdown.parse(content)
+    toc, used_anchors = [], {}
+    for index, token in enumerate(tokens):
+        if token.type != "heading_open":
+            continue
+        inline = tokens[index + 1]
+        title = "".join(child.content for child in inline.children or [] if child.type in ("text", "code_inline"))
+        anchor = _heading_anchor(title, used_anchors)
+        token.attrSet("id", anchor)
+        toc.append({"level": int(token.tag[1]), "title": title, "id": anchor})
+    
+    words = len(re.findall(r"\w+", content))
+    rendered = {
+        "contentHtml": _markdown.renderer.render(tokens, _markdown.options, {}),
+        "toc": toc,
+        "contentHash": content_hash,
+        "readTime": f"{max(1, round(words / READING_WORDS_PER_MINUTE))} min read",
+    }
+    render_cache.set("markdown", content_hash, rendered)
+    return rendered
+
+def ensure_rendered(post: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Fill in rendered fields for posts written before server-side rendering"""
+    if post and post.get("contentHash") is None:
+        post.update({field: value for field, value in render_markdown(post["content"]).items() if field in RENDERED_FIELDS})
+    return post
+
+def with_rendered_content(post_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach rendered HTML/TOC to a blog post being written; readTime is computed unless given"""
+    rendered = render_markdown(post_dict["content"])
+    post_dict.update({field: rendered[field] for field in RENDERED_FIELDS})
+    if not post_dict.get("readTime"):
+        post_dict["readTime"] = rendered["readTime"]
+    return post_dict
+
+# ============================================================================
+# PAGINATION
+# ============================================================================
+
+# Listings can be paged with skip/limit or with an opaque keyset cursor. The
+# cursor for the following page is returned in the X-Next-Cursor header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(doc: Dict[str, Any], field: str) -> str:
+    payload = json.dumps({"v": doc[field].isoformat(), "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["v"]), ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_query(query: Dict[str, Any], field: str, cursor: Optional[str]) -> Dict[str, Any]:
+    """Restrict ``query`` to documents after ``cursor`` in (field, _id) descending order"""
+    if not cursor:
+        return query
+    value, last_id = decode_cursor(cursor)
+    seek = {"$or": [{field: {"$lt": value}}, {field: value, "_id": {"$lt": last_id}}]}
+    return {"$and": [query, seek]} if query else seek
+
+def find_page(collection, query: Dict[str, Any], field: str, skip: int, limit: int, cursor: Optional[str] = None, projection: Optional[Dict[str, Any]] = None):
+    """Descending (field, _id) page, seeking by cursor when given and skipping otherwise"""
+    find_cursor = collection.find(keyset_query(query, field, cursor), projection).sort([(field, DESCENDING), ("_id", DESCENDING)])
+    if not cursor:
+        find_cursor = find_cursor.skip(skip)
+    return find_cursor.limit(limit)
+
+def set_next_cursor(response: Response, docs: List[Dict[str, Any]], field: str, limit: int):
+    if limit and len(docs) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1], field)
+
+# ============================================================================
+# ANALYTICS COUNTERS
+# ============================================================================
+
+# Running totals kept in a single document, maintained with $inc on the write
+# paths and periodically reconciled against the real counts
+ANALYTICS_COUNTERS_ID = "totals"
+ANALYTICS_COUNTER_FIELDS = ["totalContacts", "newContacts", "totalTestimonials", "totalBlogPosts", "newsletterSubscribers"]
+analytics_reconcile_task: Optional[asyncio.Task] = None
+
+async def count_analytics_totals() -> Dict[str, int]:
+    """Count every analytics total from the source collections concurrently"""
+    counts = await asyncio.gather(
+        db.contact_submissions.count_documents({}),
+        db.contact_submissions.count_documents({"status": "new"}),
+        db.testimonials.count_documents({"published": True}),
+        db.blog_posts.count_documents({"published": True}),
+        db.newsletter_subscriptions.count_documents({}),
+    )
+    return dict(zip(ANALYTICS_COUNTER_FIELDS, counts))
+
+async def reconcile_analytics_counters() -> Dict[str, int]:
+    totals = await count_analytics_totals()
+    await db.analytics_counters.update_one(
+        {"_id": ANALYTICS_COUNTERS_ID},
+        {"$set": {**totals, "reconciledAt": datetime.utcnow()}},
+        upsert=True
+    )
+    return totals
+
+async def bump_analytics_counters(**deltas: int):
+    """Apply counter deltas; a no-op while the counters are cold (not yet reconciled)"""
+    deltas = {field: int(delta) for field, delta in deltas.items() if delta}
+    if deltas:
+        await db.analytics_counters.update_one({"_id": ANALYTICS_COUNTERS_ID}, {"$inc": deltas})
+
+async def read_analytics_counters() -> Dict[str, int]:
+    """Return the running totals, counting (and warming the counters) when cold"""
+    counters = await db.analytics_counters.find_one({"_id": ANALYTICS_COUNTERS_ID})
+    if counters is None:
+        return await reconcile_analytics_counters()
+    return {field: counters.get(field, 0) for field in ANALYTICS_COUNTER_FIELDS}
+
+async def reconcile_analytics_periodically():
+    # With several workers only the lease holder reconciles; it renews the
+    # lease each round and another worker takes over if it stops
+    lease = MongoLock("analytics-reconcile", lease_seconds=ANALYTICS_RECONCILE_SECONDS * 1.5)
+    while True:
+        await asyncio.sleep(ANALYTICS_RECONCILE_SECONDS)
+        try:
+            if await lease.try_acquire():
+                await reconcile_analytics_counters()
+        except Exception as e:
+            logger.error(f"Analytics counter reconciliation failed: {e}")
+
+def _published_delta(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> int:
+    return int(bool(after and after.get("published"))) - int(bool(before and before.get("published")))
+
+# ============================================================================
+# ANALYTICS ROLLUPS
+# ============================================================================
+
+# One analytics_daily document per UTC day ("YYYY-MM-DD" _id), updated with
+# $inc on the write paths and rebuildable from the source collections:
+#   {contacts, byConsultationType: {type: n}, byStatus: {status: n}, newsletterSignups}
+ROLLUP_INTERVALS = ("day", "week", "month")
+# Longest range a timeseries request may cover (about ten years)
+TIMESERIES_MAX_DAYS = 3660
+
+def _day_key(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d")
+
+def _utc_day(value: datetime) -> datetime:
+    """Midnight of ``value``'s UTC day as a naive datetime, matching stored dates"""
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return datetime(value.year, value.month, value.day)
+
+def _rollup_field(value: Optional[str]) -> str:
+    # Field names may not contain "." or start with "$"
+    return (value or "unspecified").replace(".", "_").replace("$", "_")
+
+def _period_start(day: datetime, interval: str) -> datetime:
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+def _next_period(period: datetime, interval: str) -> datetime:
+    if interval == "week":
+        return period + timedelta(days=7)
+    if interval == "month":
+        return (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return period + timedelta(days=1)
+
+async def _inc_rollup(day: datetime, increments: Dict[str, int]):
+    await db.analytics_daily.update_one(
+        {"_id": _day_key(day)},
+        {"$inc": increments, "$setOnInsert": {"date": datetime(day.year, day.month, day.day)}},
+        upsert=True
+    )
+
+async def _inc_rollups(docs: List[Dict[str, Any]], date_field: str, increments_for):
+    """Sum ``increments_for(doc)`` per day and apply one update per affected day"""
+    days: Dict[str, Dict[str, Any]] = {}
+    for doc in docs:
+        day = days.setdefault(_day_key(doc[date_field]), {"day": doc[date_field], "inc": {}})
+        for field, delta in increments_for(doc).items():
+            day["inc"][field] = day["inc"].get(field, 0) + delta
+    await asyncio.gather(*(_inc_rollup(day["day"], day["inc"]) for day in days.values()))
+
+async def record_contact_rollups(contacts: List[Dict[str, Any]]):
+    await _inc_rollups(contacts, "submittedAt", lambda contact: {
+        "contacts": 1,
+        f"byConsultationType.{_rollup_field(contact.get('consultationType'))}": 1,
+        f"byStatus.{_rollup_field(contact.get('status'))}": 1,
+    })
+
+async def record_contact_status_rollup(previous: Dict[str, Any], new_status: str):
+    old_status = previous.get("status")
+    if old_status == new_status or not previous.get("submittedAt"):
+        return
+    await _inc_rollup(previous["submittedAt"], {
+        f"byStatus.{_rollup_field(old_status)}": -1,
+        f"byStatus.{_rollup_field(new_status)}": 1,
+    })
+
+async def record_contact_status_rollups(previous_docs: List[Dict[str, Any]], new_status: str):
+    """Batched form of record_contact_status_rollup: one update per affected day"""
+    increments: Dict[str, Dict[str, Any]] = {}
+    for previous in previous_docs:
+        old_status = previous.get("status")
+        if old_status == new_status or not previous.get("submittedAt"):
+            continue
+        day = increments.setdefault(_day_key(previous["submittedAt"]), {"day": previous["submittedAt"], "inc": {}})
+        for field, delta in ((f"byStatus.{_rollup_field(old_status)}", -1), (f"byStatus.{_rollup_field(new_status)}", 1)):
+            day["inc"][field] = day["inc"].get(field, 0) + delta
+    await asyncio.gather(*(_inc_rollup(day["day"], day["inc"]) for day in increments.values()))
+
+async def record_newsletter_rollups(subscriptions: List[Dict[str, Any]]):
+    await _inc_rollups(subscriptions, "subscribedAt", lambda subscription: {"newsletterSignups": 1})
+
+async def rebuild_analytics_rollups(start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """Recompute daily rollups from the source collections with $group pipelines.
+
+    Whole UTC days from ``start`` through ``end`` are replaced; returns the
+    number of days written.
+    """
+    start = _utc_day(start) if start else None
+    end = _utc_day(end) + timedelta(days=1) if end else None
+    
+    def date_match(field):
+        bounds = {}
+        if start:
+            bounds["$gte"] = start
+        if end:
+            bounds["$lt"] = end
+        return [{"$match": {field: bounds}}] if bounds else []
+    
+    day = lambda field: {"$dateToString": {"format": "%Y-%m-%d", "date": f"${field}"}}
+    contact_rows, newsletter_rows = await asyncio.gather(
+        db.contact_submissions.aggregate(date_match("submittedAt") + [
+            {"$group": {
+                "_id": {"day": day("submittedAt"), "type": "$consultationType", "status": "$status"},
+                "count": {"$sum": 1},
+            }},
+        ]).to_list(None),
+        db.newsletter_subscriptions.aggregate(date_match("subscribedAt") + [
+            {"$group": {"_id": day("subscribedAt"), "count": {"$sum": 1}}},
+        ]).to_list(None),
+    )
+    
+    rollups: Dict[str, Dict[str, Any]] = {}
+    def rollup(day_key):
+        return rollups.setdefault(day_key, {
+            "_id": day_key,
+            "date": datetime.strptime(day_key, "%Y-%m-%d"),
+            "contacts": 0,
+            "byConsultationType": {},
+            "byStatus": {},
+            "newsletterSignups": 0,
+        })
+    
+    for row in contact_rows:
+        doc = rollup(row["_id"]["day"])
+        doc["contacts"] += row["count"]
+        for field, value in (("byConsultationType", row["_id"].get("type")), ("byStatus", row["_id"].get("status"))):
+            key = _rollup_field(value)
+            doc[field][key] = doc[field].get(key, 0) + row["count"]
+    for row in newsletter_rows:
+        rollup(row["_id"])["newsletterSignups"] += row["count"]
+    
+    stale = {"$nin": list(rollups)}
+    if start:
+        stale["$gte"] = _day_key(start)
+    if end:
+        stale["$lt"] = _day_key(end)
+    await db.analytics_daily.delete_many({"_id": stale})
+    if rollups:
+        await db.analytics_daily.bulk_write(
+            [ReplaceOne({"_id": key}, doc, upsert=True) for key, doc in rollups.items()],
+            ordered=False
+        )
+    return len(rollups)
+
+async def analytics_timeseries(start: datetime, end: datetime, interval: str) -> List[Dict[str, Any]]:
+    """Fold daily rollups in [start, end] into day/week/month buckets, filling gaps with zeros"""
+    start, end = _utc_day(start), _utc_day(end)
+    days = await db.analytics_daily.find(
+        {"_id": {"$gte": _day_key(start), "$lte": _day_key(end)}}
+    ).to_list(None)
+    
+    def empty_bucket(period: datetime) -> Dict[str, Any]:
+        return {"period": period, "contacts": 0, "byConsultationType": {}, "byStatus": {}, "newsletterSignups": 0}
+    
+    # Only periods with data get a bucket here; gaps are filled on output
+    buckets: Dict[datetime, Dict[str, Any]] = {}
+    for doc in days:
+        period = _period_start(doc["date"], interval)
+        bucket = buckets.get(period)
+        if bucket is None:
+            bucket = buckets[period] = empty_bucket(period)
+        bucket["contacts"] += doc.get("contacts", 0)
+        bucket["newsletterSignups"] += doc.get("newsletterSignups", 0)
+        for field in ("byConsultationType", "byStatus"):
+            for key, count in doc.get(field, {}).items():
+                bucket[field][key] = bucket[field].get(key, 0) + count
+    
+    series = []
+    period = _period_start(start, interval)
+    while period <= end:
+        series.append(buckets.get(period) or empty_bucket(period))
+        period = _next_period(period, interval)
+    return series
+
+# ============================================================================
+# BULK OPERATIONS
+# ============================================================================
+
+BULK_MAX_ITEMS = 1000
+BULK_ACTIONS = ("publish", "unpublish", "delete")
+
+def check_bulk_size(items: List[Any]):
+    if not items:
+        raise HTTPException(status_code=400, detail="No items given")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+async def bulk_write_errors(collection, operations: List[Any]) -> Dict[int, str]:
+    """Run an unordered bulk_write and return error messages keyed by operation index"""
+    if not operations:
+        return {}
+    try:
+        await collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        return {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+    return {}
+
+async def bulk_apply(collection, ids: List[str], make_operation, projection: Dict[str, int]):
+    """Apply ``make_operation(_id)`` to every existing document in ``ids`` in one bulk_write.
+
+    Returns the per-item results (in request order) and the pre-write
+    projection of each document that was written successfully.
+    """
+    results = [{"id": raw_id, "success": False} for raw_id in ids]
+    object_ids = {}
+    for index, raw_id in enumerate(ids):
+        try:
+            object_ids[index] = ObjectId(raw_id)
+        except (InvalidId, TypeError):
+            results[index]["error"] = "Invalid id"
+    
+    existing = {
+        doc["_id"]: doc
+        for doc in await collection.find({"_id": {"$in": list(object_ids.values())}}, projection).to_list(None)
+    }
+    operations, operation_items = [], []
+    for index, object_id in object_ids.items():
+        if object_id not in existing:
+            results[index]["error"] = "Not found"
+            continue
+        operations.append(make_operation(object_id))
+        operation_items.append(index)
+    
+    errors = await bulk_write_errors(collection, operations)
+    applied = []
+    for position, index in enumerate(operation_items):
+        if position in errors:
+            results[index]["error"] = errors[position]
+        else:
+            results[index]["success"] = True
+            applied.append(existing[object_ids[index]])
+    return results, applied
+
+def bulk_publish_operation(action: str):
+    if action == "delete":
+        return lambda object_id: DeleteOne({"_id": object_id})
+    update = {"$set": {"published": action == "publish", "updatedAt": utc_now()}}
+    return lambda object_id: UpdateOne({"_id": object_id}, update)
+
+def bulk_published_delta(action: str, applied: List[Dict[str, Any]]) -> int:
+    after = None if action == "delete" else {"published": action == "publish"}
+    return sum(_published_delta(previous, after) for previous in applied)
+
+def bulk_summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "success": succeeded == len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+def parse_import_items(body: bytes) -> List[Any]:
+    """Parse a JSON array or NDJSON upload into a list of raw items"""
+    try:
+        text = body.decode('utf-8').strip()
+        if text.startswith("["):
+            return json.loads(text)
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Upload is not valid JSON or NDJSON: {e}")
+
+# ============================================================================
+# BLOG SEARCH
+# ============================================================================
+
+SEARCH_SNIPPET_CHARS = 160
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_SKIP = 500
+SEARCH_MAX_QUERY_CHARS = 200
+_MARKDOWN_SYNTAX = re.compile(r"[#*_`>\[\]()!|~]+")
+
+def search_terms(query: str) -> List[str]:
+    """Plain terms from a $text search string, ignoring negations"""
+    return [term for term in re.findall(r"-?\w+", query.lower()) if not term.startswith("-")]
+
+def highlight_snippet(text: str, terms: List[str], width: int = SEARCH_SNIPPET_CHARS) -> str:
+    """HTML-escaped window of ``text`` around the first matched term, matches wrapped in <mark>"""
+    plain = " ".join(_MARKDOWN_SYNTAX.sub(" ", text).split())
+    if not terms:
+        return html.escape(plain[:width])
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE)
+    first = pattern.search(plain)
+    start = max(0, first.start() - width // 3) if first else 0
+    window = plain[start:start + width]
+    
+    pieces, position = [], 0
+    for match in pattern.finditer(window):
+        pieces.append(html.escape(window[position:match.start()]))
+        pieces.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        position = match.end()
+    pieces.append(html.escape(window[position:]))
+    return ("…" if start else "") + "".join(pieces) + ("…" if start + width < len(plain) else "")
+
+async def search_blog_posts(query: str, skip: int, limit: int) -> Dict[str, Any]:
+    """Rank published posts with the blog_text index and attach highlighted snippets"""
+    text_query = {"$text": {"$search": query}, "published": True}
+    posts, total = await asyncio.gather(
+        public_reads("blog").blog_posts.find(text_query, {"score": {"$meta": "textScore"}, **{field: 0 for field in RENDERED_FIELDS}})
+            .sort([("score", {"$meta": "textScore"})]).skip(skip).limit(limit).to_list(limit),
+        public_reads("blog").blog_posts.count_documents(text_query),
+    )
+    terms = search_terms(query)
+    results = []
+    for post in posts:
+        results.append({
+            "_id": str(post["_id"]),
+            "title": post["title"],
+            "slug": post["slug"],
+            "excerpt": post["excerpt"],
+            "category": post["category"],
+            "readTime": post.get("readTime"),
+            "publishDate": post.get("publishDate"),
+            "score": round(post.get("score", 0), 4),
+            "snippet": highlight_snippet(post.get("content", ""), terms),
+        })
+    return {"query": query, "total": total, "skip": skip, "limit": limit, "results": results}
+
+# ============================================================================
+# EXPORTS
+# ============================================================================
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_DEFAULT_BATCH_SIZE = 1000
+EXPORT_MAX_BATCH_SIZE = 10000
+CONTACT_EXPORT_COLUMNS = ["_id", "name", "email", "phone", "company", "consultationType", "message", "status", "submittedAt", "notes"]
+NEWSLETTER_EXPORT_COLUMNS = ["_id", "email", "subscribedAt"]
+
+def _csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    text = str(value)
+    # Keep spreadsheet apps from evaluating submitted text as a formula
+    if text[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + text
+    return text
+
+async def stream_export(cursor, columns: List[str], export_format: str, batch_size: int):
+    """Yield an export one cursor batch at a time so memory stays bounded by batch_size"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    def csv_line(values: List[str]) -> bytes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue().encode('utf-8')
+    
+    def encode_row(doc: Dict[str, Any]) -> bytes:
+        if export_format == "csv":
+            return csv_line([_csv_value(doc.get(column)) for column in columns])
+        return encode_json({column: doc.get(column) for column in columns}) + b"\n"
+    
+    if export_format == "csv":
+        yield csv_line(columns)
+    
+    lines: List[bytes] = []
+    async for doc in cursor:
+        lines.append(encode_row(doc))
+        if len(lines) >= batch_size:
+            yield b"".join(lines)
+            lines.clear()
+    if lines:
+        yield b"".join(lines)
+
+def export_response(collection, query: Dict[str, Any], sort_field: str, columns: List[str], export_format: str, batch_size: int, name: str):
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    batch_size = max(1, min(batch_size, EXPORT_MAX_BATCH_SIZE))
+    cursor = collection.find(query, {column: 1 for column in columns}).sort(sort_field, ASCENDING).batch_size(batch_size)
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    return StreamingResponse(
+        stream_export(cursor, columns, export_format, batch_size),
+        media_type="text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def date_range_query(field: str, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    bounds = {}
+    if start:
+        bounds["$gte"] = start
+    if end:
+        bounds["$lt"] = end
+    return {field: bounds} if bounds else {}
+
+# ============================================================================
+# INGESTION
+# ============================================================================
+
+async def write_contact_submissions(contacts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert contacts (with pre-assigned _ids) and update analytics; returns the newly stored ones.
+
+    Already-stored _ids (e.g. replayed from the spool) are skipped, not duplicated.
+    """
+    failed = set()
+    try:
+        await db.contact_submissions.insert_many(contacts, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            if error.get("code") != 11000:
+                raise
+            failed.add(error["index"])
+    stored = [contact for index, contact in enumerate(contacts) if index not in failed]
+    await asyncio.gather(
+        bump_analytics_counters(totalContacts=len(stored), newContacts=len(stored)),
+        record_contact_rollups(stored),
+    )
+    return stored
+
+async def write_newsletter_subscriptions(subscriptions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Upsert subscriptions by email, deduplicating against the unique email index.
+
+    Returns the subscriptions that were new.
+    """
+    operations = [
+        UpdateOne({"email": subscription["email"]}, {"$setOnInsert": subscription}, upsert=True)
+        for subscription in subscriptions
+    ]
+    try:
+        result = await db.newsletter_subscriptions.bulk_write(operations, ordered=False)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        # Two concurrent upserts of the same new email: one wins, the other is a duplicate
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+        upserted = {item["index"]: item["_id"] for item in e.details.get("upserted", [])}
+    stored = [subscriptions[index] for index in upserted]
+    await asyncio.gather(
+        bump_analytics_counters(newsletterSubscribers=len(stored)),
+        record_newsletter_rollups(stored),
+    )
+    return stored
+
+INGEST_WRITERS = {
+    "contact": write_contact_submissions,
+    "newsletter": write_newsletter_subscriptions,
+}
+
+class IngestionQueue:
+    """Bounded write-behind queue for public form submissions.
+
+    Submissions are accepted into memory, then a background worker drains
+    them in batches of up to ``batch_size``, waiting at most
+    ``flush_interval`` to fill one. When the queue is full callers write
+    synchronously instead.
+
+    With a spool path, accepted submissions are also journalled to
+    per-process spool segments (``<spool>.<pid>.<n>``) by a writer task that
+    group-commits whatever has accumulated with one write and fsync on a
+    thread; ``submit`` returns once its entry is synced, so an acknowledged
+    submission survives a host crash. A new segment is started after every
+    flushed batch and segments whose submissions are all in the database are
+    deleted, so the spool stays bounded. Spools of exited processes are
+    replayed on startup.
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float, spool_path: Optional[str] = None):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._spool_base = Path(spool_path) if spool_path else None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._spool_writer: Optional[asyncio.Task] = None
+        self._in_flight = 0
+        # Submissions are numbered in acceptance order; the queue is FIFO, so
+        # everything up to _flushed_seq is in the database
+        self._seq = 0
+        self._flushed_seq = 0
+        # Everything up to _synced_seq is fsynced to the spool (or flushed)
+        self._synced_seq = 0
+        self._synced = asyncio.Condition()
+        self._spool_buffer: List[tuple] = []
+        self._spool_ready = asyncio.Event()
+        self._spool_lock = asyncio.Lock()
+        self._segment = 0
+        self._segment_last: Dict[int, int] = {}
+        self._writing_segment: Optional[int] = None
+        self.accepted = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    @property
+    def spool_path(self) -> Optional[Path]:
+        """The segment new submissions are written to"""
+        return self._segment_path(self._segment) if self._spool_base else None
+
+    def _segment_path(self, segment: int) -> Path:
+        return self._spool_base.with_name(f"{self._spool_base.name}.{os.getpid()}.{segment}")
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._spool_ready = asyncio.Event()
+        self._spool_lock = asyncio.Lock()
+        self._synced = asyncio.Condition()
+        await self._replay_spool()
+        self._worker = asyncio.create_task(self._run())
+        if self._spool_base:
+            self._spool_writer = asyncio.create_task(self._write_spool_forever())
+
+    async def stop(self, timeout: float = 10):
+        """Flush whatever is queued, then stop the worker"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Ingestion queue stopped with {self._queue.qsize()} submissions unflushed (kept in spool)")
+        self._worker.cancel()
+        if self._spool_writer:
+            # Never interrupt a write in progress: its submitters are waiting on it
+            async with self._spool_lock:
+                self._spool_writer.cancel()
+            await self._write_spool()
+
+    async def submit(self, kind: str, doc: Dict[str, Any]) -> bool:
+        """Queue a submission; returns False when the queue is full or not running.
+
+        With a spool, returns once the submission is fsynced (or already in
+        the database), sharing the fsync with everything submitted meanwhile.
+        """
+        if not self.running or self._queue.full():
+            self.rejected += 1
+            return False
+        self._seq += 1
+        seq = self._seq
+        self._queue.put_nowait((kind, doc, seq))
+        self.accepted += 1
+        if self._spool_base:
+            self._spool_buffer.append((seq, json_util.dumps({"kind": kind, "doc": doc}) + "\n"))
+            self._spool_ready.set()
+            async with self._synced:
+                await self._synced.wait_for(lambda: self._synced_seq >= seq)
+        return True
+
+    async def _mark_synced(self, seq: int):
+        if seq > self._synced_seq:
+            self._synced_seq = seq
+            async with self._synced:
+                self._synced.notify_all()
+
+    async def _next_batch(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            self._in_flight = len(batch)
+            backoff = 0.5
+            while True:
+                try:
+                    await self._flush(batch)
+                    break
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Ingestion flush of {len(batch)} submissions failed, retrying in {backoff}s: {e}")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30)
+            self._in_flight = 0
+            self._flushed_seq = batch[-1][2]
+            if self._spool_base:
+                await self._mark_synced(self._flushed_seq)
+                await self._rotate_spool()
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _flush(self, batch: List[tuple]):
+        started = time.perf_counter()
+        for kind, writer in INGEST_WRITERS.items():
+            docs = [doc for item_kind, doc, _ in batch if item_kind == kind]
+            if docs:
+                await writer(docs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushed += len(batch)
+        self.batches += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+
+    async def _write_spool_forever(self):
+        while True:
+            await self._spool_ready.wait()
+            async with self._spool_lock:
+                await self._write_spool()
+
+    async def _write_spool(self):
+        """Append and fsync everything submitted since the last write, off the event loop"""
+        self._spool_ready.clear()
+        entries, self._spool_buffer = self._spool_buffer, []
+        if not entries:
+            return
+        last_seq = entries[-1][0]
+        # Submissions already flushed to the database needn't be journalled
+        entries = [entry for entry in entries if entry[0] > self._flushed_seq]
+        segment = self._writing_segment = self._segment
+        try:
+            if entries:
+                await asyncio.to_thread(_append_and_sync, self._segment_path(segment), "".join(line for _, line in entries))
+                self._segment_last[segment] = last_seq
+        except OSError as e:
+            # Submissions stay queued and are still acknowledged; only their
+            # crash safety is lost
+            logger.error(f"Could not write ingestion spool {self._segment_path(segment)}: {e}")
+        finally:
+            self._writing_segment = None
+        await self._mark_synced(last_seq)
+
+    async def _rotate_spool(self):
+        """Start a new segment and delete the ones whose submissions are all flushed"""
+        if self._segment in self._segment_last:
+            self._segment += 1
+        done = [
+            segment for segment, last in self._segment_last.items()
+            if last <= self._flushed_seq and segment != self._writing_segment
+        ]
+        for segment in done:
+            del self._segment_last[segment]
+        if done:
+            await asyncio.to_thread(_remove_files, [self._segment_path(segment) for segment in done])
+
+    def _orphaned_spools(self) -> List[Path]:
+        """Spool segments whose process has exited, including older single-file spools"""
+        if not self._spool_base or not self._spool_base.parent.exists():
+            return []
+        orphaned = []
+        for path in self._spool_base.parent.glob(f"{self._spool_base.name}*"):
+            suffix = path.name[len(self._spool_base.name):]
+            if suffix:
+                parts = suffix[1:].split(".")
+                if not (suffix.startswith(".") and len(parts) <= 2 and all(part.isdigit() for part in parts)):
+                    continue
+                pid = int(parts[0])
+                if pid != os.getpid() and _process_alive(pid):
+                    continue
+            orphaned.append(path)
+        return sorted(orphaned)
+
+    async def _replay_spool(self):
+        """Write submissions left in spools by exited processes; writes are idempotent"""
+        orphaned = self._orphaned_spools()
+        if not orphaned:
+            return
+        pending: Dict[str, List[Dict[str, Any]]] = {}
+        # Workers starting together may both pick up a segment; whichever reads
+        # it replays it (again, harmlessly) and a vanished one is skipped
+        lines = await asyncio.to_thread(_read_spools, orphaned)
+        for line in lines:
+            try:
+                item = json_util.loads(line)
+            except ValueError:
+                logger.error("Skipping unreadable ingestion spool entry")
+                continue
+            pending.setdefault(item["kind"], []).append(item["doc"])
+        for kind, docs in pending.items():
+            for offset in range(0, len(docs), self.batch_size):
+                await INGEST_WRITERS[kind](docs[offset:offset + self.batch_size])
+        if pending:
+            logger.info(f"Replayed {sum(len(docs) for docs in pending.values())} spooled submissions")
+        await asyncio.to_thread(_remove_files, orphaned)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": INGEST_WRITE_BEHIND,
+            "running": self.running,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "inFlight": self._in_flight,
+            "maxSize": self.max_size,
+            "batchSize": self.batch_size,
+            "accepted": self.accepted,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "lastFlushMs": round(self.last_flush_ms, 3),
+            "maxFlushMs": round(self.max_flush_ms, 3),
+            "avgFlushMs": round(self.total_flush_ms / self.batches, 3) if self.batches else 0.0,
+            "spool": str(self.spool_path) if self.spool_path else None,
+            "spoolSegments": len(self._segment_last),
+        }
+
+def _append_and_sync(path: Path, data: str):
+    with path.open("a", encoding="utf-8") as spool:
+        spool.write(data)
+        spool.flush()
+        os.fsync(spool.fileno())
+
+def _read_spools(paths: List[Path]) -> List[str]:
+    lines = []
+    for path in paths:
+        try:
+            lines.extend(path.read_text(encoding="utf-8").splitlines())
+        except FileNotFoundError:
+            continue
+    return lines
+
+def _remove_files(paths: List[Path]):
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+ingestion_queue = IngestionQueue(
+    max_size=INGEST_QUEUE_SIZE,
+    batch_size=INGEST_BATCH_SIZE,
+    flush_interval=INGEST_FLUSH_INTERVAL_SECONDS,
+    spool_path=INGEST_SPOOL_PATH
+)
+
+# ============================================================================
+# STATIC PUBLISHING
+# ============================================================================
+
+# Artifacts mirror the public API paths so a CDN can serve them directly:
+#   api/services.json, api/testimonials.json, api/blog.json (all published
+#   posts), api/blog/summaries.json, api/blog/<slug>.json (with rendered HTML),
+#   blog/<slug>/index.html and sitemap.xml, each with .gz/.br variants.
+# manifest.json records the source version of every artifact, so a publish
+# only rewrites what changed and removes what was unpublished or deleted.
+STATIC_MANIFEST = "manifest.json"
+STATIC_LAYOUT_VERSION = 1  # bump when the artifact format changes to force a full rebuild
+STATIC_RESERVED_SLUGS = RESERVED_BLOG_SLUGS  # rejected on write; posts predating that are skipped
+_static_slug_pattern = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9._-]*$")
+
+STATIC_POST_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<meta name="description" content="{description}">
+<link rel="canonical" href="{url}">
+</head>
+<body>
+<article>
+{content}</article>
+</body>
+</html>
+"""
+
+def _static_version(doc: Dict[str, Any]) -> str:
+    return (doc.get("updatedAt") or doc.get("createdAt") or datetime.min).isoformat()
+
+def _static_list_version(docs: List[Dict[str, Any]]) -> str:
+    return hashlib.sha1("|".join(f"{doc['_id']}:{_static_version(doc)}" for doc in docs).encode('utf-8')).hexdigest()
+
+def _model_json(model, docs: List[Dict[str, Any]], **options) -> bytes:
+    """Encode documents the way a route with ``response_model=List[model]`` does"""
+    return encode_json([model(**serialize_doc(doc)).dict(by_alias=True, **options) for doc in docs])
+
+def _atomic_write(path: Path, body: bytes):
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(body)
+    os.replace(temporary, path)
+
+class StaticPublisher:
+    """Renders public content into a static directory for CDN serving.
+
+    ``schedule()`` is called after admin content writes; runs are debounced
+    by ``delay`` seconds and coalesced, so a burst of edits publishes once.
+    """
+
+    def __init__(self, output_dir: Optional[str], delay: float = 2.0):
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.delay = delay
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self.runs = 0
+        self.failures = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def schedule(self):
+        if self.output_dir is None:
+            return
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_scheduled())
+
+    async def _run_scheduled(self):
+        while self._dirty:
+            await asyncio.sleep(self.delay)
+            self._dirty = False
+            try:
+                await self.publish()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Static publish failed: {e}")
+
+    @staticmethod
+    def _write(root: Path, relative: str, body: bytes):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, body)
+        _atomic_write(path.with_name(path.name + ".gz"), gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _atomic_write(path.with_name(path.name + ".br"), brotli.compress(body, quality=11))
+
+    @staticmethod
+    def _remove(root: Path, relative: str):
+        path = root / relative
+        for variant in (path, path.with_name(path.name + ".gz"), path.with_name(path.name + ".br")):
+            variant.unlink(missing_ok=True)
+        if path.parent != root and not any(path.parent.iterdir()):
+            path.parent.rmdir()
+
+    @staticmethod
+    def _post_html(post: Dict[str, Any]) -> bytes:
+        return STATIC_POST_TEMPLATE.format(
+            title=html.escape(post.get("seoTitle") or post["title"]),
+            description=html.escape(post.get("seoDescription") or post.get("excerpt") or ""),
+            url=html.escape(f"{SITE_URL}/blog/{post['slug']}/"),
+            content=post.get("contentHtml") or "",
+        ).encode('utf-8')
+
+    @staticmethod
+    def _sitemap(posts: List[Dict[str, Any]]) -> bytes:
+        entries = [(f"{SITE_URL}/", max((doc.get("updatedAt") or doc.get("createdAt") for doc in posts), default=None))]
+        entries += [(f"{SITE_URL}/blog/{post['slug']}/", post.get("updatedAt") or post.get("createdAt")) for post in posts]
+        urls = "".join(
+            f"  <url><loc>{html.escape(location)}</loc>{f'<lastmod>{modified.date().isoformat()}</lastmod>' if modified else ''}</url>\n"
+            for location, modified in entries
+        )
+        return f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n{urls}</urlset>\n'.encode('utf-8')
+
+    async def publish(self, force: bool = False, output_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Regenerate changed artifacts; ``force`` rewrites everything"""
+        root = Path(output_dir) if output_dir else self.output_dir
+        if root is None:
+            raise ValueError("No static output directory configured (set STATIC_OUTPUT_DIR)")
+        
+        async with self._lock:
+            started = time.perf_counter()
+            root.mkdir(parents=True, exist_ok=True)
+            manifest_path = root / STATIC_MANIFEST
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8')) if manifest_path.exists() else {}
+            settings = {"siteUrl": SITE_URL, "layout": STATIC_LAYOUT_VERSION}
+            published_before = manifest.get("artifacts", {})
+            previous = {} if force or manifest.get("settings") != settings else published_before
+            artifacts: Dict[str, str] = {}
+            written: List[str] = []
+            
+            def fresh(relative: str, version: str) -> bool:
+                artifacts[relative] = version
+                return previous.get(relative) == version and (root / relative).exists()
+            
+            async def put(relative: str, body: bytes):
+                await asyncio.to_thread(self._write, root, relative, body)
+                written.append(relative)
+            
+            # Versions come from a projection; full documents are only read for stale artifacts
+            version_fields = {"slug": 1, "updatedAt": 1, "createdAt": 1}
+            published = {"published": True}
+            newest_first = [("publishDate", DESCENDING), ("_id", DESCENDING)]
+            posts = await db.blog_posts.find(published, version_fields).sort(newest_first).to_list(None)
+            posts = [post for post in posts if _static_slug_pattern.match(post["slug"]) and post["slug"] not in STATIC_RESERVED_SLUGS]
+            posts_version = _static_list_version(posts)
+            
+            if not fresh("api/blog.json", posts_version):
+                docs = await db.blog_posts.find(published, {field: 0 for field in RENDERED_FIELDS}).sort(newest_first).to_list(None)
+                await put("api/blog.json", _model_json(BlogPost, docs))
+            if not fresh("api/blog/summaries.json", posts_version):
+                docs = await db.blog_posts.find(published, {field: 1 for field in BLOG_SUMMARY_FIELDS}).sort(newest_first).to_list(None)
+                await put("api/blog/summaries.json", _model_json(BlogPostSummary, docs, exclude_unset=True))
+            if not fresh("sitemap.xml", posts_version):
+                await put("sitemap.xml", self._sitemap(posts))
+            
+            stale_posts = []
+            for post in posts:
+                version = _static_version(post)
+                json_fresh = fresh(f"api/blog/{post['slug']}.json", version)
+                html_fresh = fresh(f"blog/{post['slug']}/index.html", version)
+                if not (json_fresh and html_fresh):
+                    stale_posts.append(post["_id"])
+            for start in range(0, len(stale_posts), 500):
+                async for post in db.blog_posts.find({"_id": {"$in": stale_posts[start:start + 500]}}):
+                    post = ensure_rendered(post)
+                    await put(f"blog/{post['slug']}/index.html", self._post_html(post))
+                    await put(f"api/blog/{post['slug']}.json", encode_json(BlogPost(**serialize_doc(post)).dict(by_alias=True)))
+            
+            for collection_name, model, sort in (("testimonials", Testimonial, ("createdAt", DESCENDING)), ("services", Service, ("order", ASCENDING))):
+                relative = f"api/{collection_name}.json"
+                index = await db[collection_name].find(published, version_fields).sort(*sort).to_list(100)
+                if not fresh(relative, _static_list_version(index)):
+                    await put(relative, _model_json(model, await db[collection_name].find(published).sort(*sort).to_list(100)))
+            
+            removed = [relative for relative in published_before if relative not in artifacts]
+            for relative in removed:
+                await asyncio.to_thread(self._remove, root, relative)
+            _atomic_write(manifest_path, json.dumps({"settings": settings, "artifacts": artifacts}, indent=1, sort_keys=True).encode('utf-8'))
+            
+            self.runs += 1
+            self.last_run = {
+                "at": utc_now(),
+                "written": len(written),
+                "removed": len(removed),
+                "unchanged": len(artifacts) - len(written),
+                "durationMs": round((time.perf_counter() - started) * 1000, 3),
+            }
+            logger.info(f"Published static site to {root}: {self.last_run['written']} written, {self.last_run['removed']} removed")
+            return {**self.last_run, "paths": written}
+
+static_publisher = StaticPublisher(STATIC_OUTPUT_DIR, STATIC_PUBLISH_DELAY_SECONDS)
+
+async def content_changed(namespace: str):
+    """Drop cached public responses for ``namespace`` on every worker after an admin write and queue a static re-publish"""
+    response_cache.invalidate(namespace)
+    search_cache.invalidate(namespace)
+    await cache_sync.publish("responses", namespace)
+    static_publisher.schedule()
+
+# ============================================================================
+# COMPRESSION
+# ============================================================================
+
+COMPRESSIBLE_TYPES = {"application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html", "application/xml"}
+# On-the-fly levels favour speed; bodies cached for the public routes are
+# compressed once, so they get the stronger settings
+COMPRESSION_LEVELS = {"gzip": 6, "br": 4}
+CACHED_COMPRESSION_LEVELS = {"gzip": 9, "br": 9}
+COMPRESSION_OFFLOAD_BYTES = 256 * 1024  # larger bodies are compressed on a worker thread
+# Public read routes whose compressed bodies are cached in the route's
+# response_cache namespace, so admin writes drop them with the rest
+COMPRESSION_CACHE_NAMESPACES = (("/api/blog", "blog"), ("/api/testimonials", "testimonials"), ("/api/services", "services"))
+# Unbounded key spaces (arbitrary search queries) are compressed on the fly
+COMPRESSION_CACHE_EXCLUDED_PATHS = {"/api/blog/search"}
+
+def compress_body(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported coding from an Accept-Encoding header (br over gzip on ties)"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip()] = quality
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [(weights.get(coding, weights.get("*", 0.0)), -rank, coding) for rank, coding in enumerate(supported)]
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Strong ETags must differ per content coding; weak ones may be shared"""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_LEVELS["br"])
+        else:
+            self._compressor = zlib.compressobj(COMPRESSION_LEVELS["gzip"], zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flush every chunk so streamed exports reach the client progressively
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+class CompressionMiddleware:
+    """gzip/brotli for compressible responses of at least ``minimum_size`` bytes.
+
+    Streamed responses (exports) are compressed incrementally. Bodies from the
+    public read routes are cached compressed, keyed by a digest of the
+    uncompressed body, so the same /api/blog payload is not recompressed on
+    every request.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    @staticmethod
+    def _cache_namespace(scope) -> Optional[str]:
+        if scope["method"] != "GET" or scope["path"] in COMPRESSION_CACHE_EXCLUDED_PATHS:
+            return None
+        for prefix, namespace in COMPRESSION_CACHE_NAMESPACES:
+            if scope["path"] == prefix or scope["path"].startswith(prefix + "/"):
+                return namespace
+        return None
+
+    async def _compress(self, body: bytes, encoding: str, namespace: Optional[str]) -> bytes:
+        if namespace is None:
+            level = COMPRESSION_LEVELS[encoding]
+            if len(body) >= COMPRESSION_OFFLOAD_BYTES:
+                return await asyncio.to_thread(compress_body, body, encoding, level)
+            return compress_body(body, encoding, level)
+        
+        key = ("compressed", encoding, hashlib.sha1(body).hexdigest())
+        compressed = response_cache.get(namespace, key)
+        if compressed is None:
+            compressed = await asyncio.to_thread(compress_body, body, encoding, CACHED_COMPRESSION_LEVELS[encoding])
+            response_cache.set(namespace, key, compressed)
+        return compressed
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        if_none_match = [tag.strip() for tag in request_headers.get("if-none-match", "").split(",")]
+        namespace = self._cache_namespace(scope)
+        start_message = None
+        compressor: Optional[_StreamCompressor] = None
+        
+        async def send_compressed(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if message["status"] == 304:
+                    # Validators vary with the coding, so caches must key 304s on it too
+                    headers.add_vary_header("Accept-Encoding")
+                    # Echo the encoded variant the client validated with
+                    if etag and encoding and encoded_etag(etag, encoding) in if_none_match:
+                        headers["etag"] = encoded_etag(etag, encoding)
+                content_type = headers.get("content-type", "").split(";")[0].strip()
+                if message["status"] == 304 or content_type not in COMPRESSIBLE_TYPES or "content-encoding" in headers:
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                if encoding is None:
+                    await send(message)
+                    return
+                start_message = message  # held until the body shows whether it is worth compressing
+                return
+            
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body:
+                    if len(body) >= self.minimum_size:
+                        compressed = await self._compress(body, encoding, namespace)
+                        headers["content-encoding"] = encoding
+                        headers["content-length"] = str(len(compressed))
+                        if "etag" in headers:
+                            headers["etag"] = encoded_etag(headers["etag"], encoding)
+                        metrics.inc("http_response_bytes_total", "Response body bytes before and after compression", (("encoding", encoding), ("stage", "original")), len(body))
+                        metrics.inc("http_response_bytes_total", "Response body bytes before and after compression", (("encoding", encoding), ("stage", "compressed")), len(compressed))
+                        body = compressed
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = _StreamCompressor(encoding)
+                headers["content-encoding"] = encoding
+                del headers["content-length"]
+                if "etag" in headers:
+                    headers["etag"] = encoded_etag(headers["etag"], encoding)
+                await send(start_message)
+            
+            chunk = compressor.chunk(body) if body else b""
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        
+        await self.app(scope, receive, send_compressed)
+
+# ============================================================================
+# ADMISSION CONTROL
+# ============================================================================
+
+RATE_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+def parse_rate(spec: Optional[str]) -> Optional[tuple]:
+    """Parse "<count>/<period>" into (tokens per second, burst); None when disabled"""
+    if not spec:
+        return None
+    count, _, period = spec.partition("/")
+    return int(count) / RATE_PERIODS[period.strip() or "second"], int(count)
+
+class MemoryRateLimitBackend:
+    """Per-process token buckets, least recently used evicted beyond ``max_keys``"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token; returns 0 when allowed, otherwise seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / rate
+
+class MongoRateLimitBackend:
+    """Token buckets shared by every worker, one rate_limits document per key.
+
+    The refill-and-take is a single pipeline update so concurrent workers
+    cannot both spend the last token; idle buckets expire via a TTL index.
+    Fails open if MongoDB is unavailable.
+    """
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.time()
+        tokens = {"$min": [burst, {"$add": [
+            {"$ifNull": ["$tokens", burst]},
+            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$updated", now]}]}, rate]},
+        ]}]}
+        try:
+            bucket = await db.rate_limits.find_one_and_update(
+                {"_id": key},
+                [
+                    {"$set": {"tokens": tokens, "updated": now, "expiresAt": utc_now() + timedelta(seconds=burst / rate)}},
+                    {"$set": {
+                        "allowed": {"$gte": ["$tokens", 1]},
+                        "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    }},
+                ],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except Exception as e:
+            logger.error(f"Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+        return 0.0 if bucket["allowed"] else (1 - bucket["tokens"]) / rate
+
+RATE_LIMIT_BACKENDS = {"memory": MemoryRateLimitBackend, "mongo": MongoRateLimitBackend}
+
+# Limited endpoints: (per-client limit, global limit) for POSTs to each path
+RATE_LIMIT_RULES: Dict[str, tuple] = {
+    "/api/contact": (parse_rate(RATE_LIMIT_CONTACT_PER_IP), parse_rate(RATE_LIMIT_CONTACT_GLOBAL)),
+    "/api/newsletter": (parse_rate(RATE_LIMIT_NEWSLETTER_PER_IP), parse_rate(RATE_LIMIT_NEWSLETTER_GLOBAL)),
+    "/api/auth/login": (parse_rate(RATE_LIMIT_LOGIN_PER_IP), parse_rate(RATE_LIMIT_LOGIN_GLOBAL)),
+}
+
+# Always admitted so probes and scrapes keep working under load; admin event
+# streams are long-lived and would otherwise hold in-flight slots indefinitely
+ADMISSION_EXEMPT_PATHS = {"/api/health", "/metrics", "/api/admin/events"}
+
+class LoadMonitor:
+    """Samples event loop lag by timing a short sleep; rises fast, decays slowly"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+            self.lag_ms = lag_ms if lag_ms > self.lag_ms else self.lag_ms * 0.8 + lag_ms * 0.2
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+load_monitor = LoadMonitor()
+
+class AdmissionController:
+    """Concurrency cap for all requests, plus load shedding and per-client /
+    global token buckets for the rate-limited POST endpoints"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.shed = 0
+        self.limited = 0
+
+    @staticmethod
+    def client_ip(scope) -> str:
+        if RATE_LIMIT_TRUST_FORWARDED:
+            forwarded = [
+                entry.strip()
+                for key, value in scope.get("headers", []) if key == b"x-forwarded-for"
+                for entry in value.decode("latin-1").split(",") if entry.strip()
+            ]
+            if forwarded:
+                return forwarded[-min(RATE_LIMIT_TRUSTED_PROXY_HOPS, len(forwarded))]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _overloaded(self, path: str) -> Optional[str]:
+        if load_monitor.lag_ms > ADMISSION_MAX_LOOP_LAG_MS:
+            return "Server is busy, please retry shortly"
+        if path in ("/api/contact", "/api/newsletter") and ingestion_queue.running \
+                and ingestion_queue.stats()["depth"] >= ingestion_queue.max_size * ADMISSION_MAX_QUEUE_FILL:
+            return "Too many submissions in progress, please retry shortly"
+        return None
+
+    async def _retry_after(self, scope, path: str) -> float:
+        per_client, global_limit = RATE_LIMIT_RULES[path]
+        # Per-client first, so a single abusive client doesn't drain the global bucket
+        if per_client:
+            wait = await self.backend.take(f"ip:{path}:{self.client_ip(scope)}", *per_client)
+            if wait:
+                return wait
+        if global_limit:
+            return await self.backend.take(f"global:{path}", *global_limit)
+        return 0.0
 
-# JWT Configuration
-JWT_SECRET = os.environ.get('JWT_SECRET', 'christopher-merrick-secret-key-2024')
-JWT_ALGORITHM = "HS256"
-JWT_EXPIRATION_HOURS = 24
+    async def check(self, scope) -> Optional[tuple]:
+        """Return (status_code, detail, retry_after) to reject the request, or None to admit it"""
+        if self.in_flight >= ADMISSION_MAX_IN_FLIGHT:
+            self.shed += 1
+            return status.HTTP_503_SERVICE_UNAVAILABLE, "Server is busy, please retry shortly", 1
+        
+        path = scope["path"]
+        if RATE_LIMIT_ENABLED and scope["method"] == "POST" and path in RATE_LIMIT_RULES:
+            overloaded = self._overloaded(path)
+            if overloaded:
+                self.shed += 1
+                return status.HTTP_503_SERVICE_UNAVAILABLE, overloaded, 1
+            retry_after = await self._retry_after(scope, path)
+            if retry_after:
+                self.limited += 1
+                return status.HTTP_429_TOO_MANY_REQUESTS, "Too many requests, please slow down", retry_after
+        return None
 
-# Create the main app
-app = FastAPI(title="Christopher Merrick Database Consulting API")
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": RATE_LIMIT_ENABLED,
+            "backend": type(self.backend).__name__,
+            "inFlight": self.in_flight,
+            "peakInFlight": self.peak_in_flight,
+            "maxInFlight": ADMISSION_MAX_IN_FLIGHT,
+            "shed": self.shed,
+            "rateLimited": self.limited,
+            "loopLagMs": round(load_monitor.lag_ms, 3),
+            "maxLoopLagMs": round(load_monitor.max_lag_ms, 3),
+            "loopLagThresholdMs": ADMISSION_MAX_LOOP_LAG_MS,
+        }
 
-# Security
-security = HTTPBearer()
+admission_controller = AdmissionController(RATE_LIMIT_BACKENDS[RATE_LIMIT_BACKEND]())
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+class AdmissionControlMiddleware:
+    """Rejects requests refused by the admission controller before routing"""
 
-# Helper function to convert ObjectId to string
-def serialize_doc(doc):
-    if doc and "_id" in doc:
-        doc["_id"] = str(doc["_id"])
-    return doc
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in ADMISSION_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        rejection = await self.controller.check(scope)
+        if rejection:
+            status_code, detail, retry_after = rejection
+            headers = {"Retry-After": str(max(1, int(retry_after + 0.999)))}
+            await JSONResponse({"detail": detail}, status_code=status_code, headers=headers)(scope, receive, send)
+            return
+        
+        controller = self.controller
+        controller.in_flight += 1
+        controller.peak_in_flight = max(controller.peak_in_flight, controller.in_flight)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.in_flight -= 1
 
 # ============================================================================
-# MODELS
+# ADMIN LIVE UPDATES
 # ============================================================================
 
-class BlogPost(BaseModel):
-    id: Optional[str] = Field(None, alias="_id")
-    title: str
-    slug: str
-    excerpt: str
-    content: str
-    category: str
-    readTime: str = "5 min read"
-    published: bool = True
-    publishDate: datetime = Field(default_factory=datetime.utcnow)
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
-    updatedAt: datetime = Field(default_factory=datetime.utcnow)
-    seoTitle: Optional[str] = None
-    seoDescription: Optional[str] = None
+# Change stream operation filter for the collections the dashboard follows
+ADMIN_EVENT_PIPELINE = [{"$match": {
+    "ns.coll": {"$in": ["contact_submissions", "analytics_counters"]},
+    "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+}}]
+# Polling seeks past the last contact it sent, and re-counts this far back to
+# notice write-behind inserts stamped before they reached the database
+ADMIN_EVENT_POLL_OVERLAP = timedelta(seconds=60)
 
-class BlogPostCreate(BaseModel):
-    title: str
-    slug: str
-    excerpt: str
-    content: str
-    category: str
-    readTime: str = "5 min read"
-    published: bool = True
-    seoTitle: Optional[str] = None
-    seoDescription: Optional[str] = None
+def sse_message(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + encode_json(data) + b"\n\n"
 
-class Testimonial(BaseModel):
-    id: Optional[str] = Field(None, alias="_id")
-    name: str
-    company: str
-    location: str
-    text: str
-    rating: int = Field(ge=1, le=5)
-    published: bool = True
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
-    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+class AdminEventHub:
+    """Fans dashboard events out to every admin connected to /api/admin/events.
 
-class TestimonialCreate(BaseModel):
-    name: str
-    company: str
-    location: str
-    text: str
-    rating: int = Field(ge=1, le=5)
-    published: bool = True
+    A single consumer per process feeds all subscribers: a database change
+    stream where the server supports one (replica sets), otherwise polling
+    for new and updated contacts and counter changes every ``poll_interval``.
+    The consumer only runs while someone is subscribed. Subscribers that fall
+    ``queue_size`` messages behind are disconnected and resync on reconnect.
+    """
 
-class ContactSubmission(BaseModel):
-    id: Optional[str] = Field(None, alias="_id")
-    name: str
-    email: EmailStr
-    phone: Optional[str] = None
-    company: Optional[str] = None
-    consultationType: Optional[str] = None
-    message: str
-    status: str = "new"  # new, contacted, completed
-    submittedAt: datetime = Field(default_factory=datetime.utcnow)
-    notes: Optional[str] = None
+    def __init__(self, poll_interval: float, queue_size: int):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.subscribers: set = set()
+        self.mode: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+        self._counters: Optional[Dict[str, int]] = None
+        self._seen: OrderedDict = OrderedDict()
+        self.published = 0
+        self.dropped = 0
 
-class ContactSubmissionCreate(BaseModel):
-    name: str
-    email: EmailStr
-    phone: Optional[str] = None
-    company: Optional[str] = None
-    consultationType: Optional[str] = None
-    message: str
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
 
-class Service(BaseModel):
-    id: Optional[str] = Field(None, alias="_id")
-    title: str
-    description: str
-    icon: str
-    features: List[str]
-    pricing: Optional[Dict[str, str]] = None
-    published: bool = True
-    order: int = 0
-    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            self.stop()
 
-class ServiceUpdate(BaseModel):
-    title: Optional[str] = None
-    description: Optional[str] = None
-    icon: Optional[str] = None
-    features: Optional[List[str]] = None
-    pricing: Optional[Dict[str, str]] = None
-    published: Optional[bool] = None
-    order: Optional[int] = None
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
 
-class AdminUser(BaseModel):
-    id: Optional[str] = Field(None, alias="_id")
-    email: EmailStr
-    passwordHash: str
-    name: str
-    role: str = "admin"
-    lastLogin: Optional[datetime] = None
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    def close(self):
+        """End every subscriber's stream and stop the consumer"""
+        for queue in self.subscribers:
+            self._close(queue)
+        self.subscribers.clear()
+        self.stop()
 
-class AdminLogin(BaseModel):
-    email: EmailStr
-    password: str
+    def publish(self, event: str, data: Any):
+        message = sse_message(event, data)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # The client reconnects and resyncs
+                self.subscribers.discard(queue)
+                self._close(queue)
+                self.dropped += 1
+        self.published += 1
 
-class NewsletterSubscription(BaseModel):
-    email: EmailStr
-    subscribedAt: datetime = Field(default_factory=datetime.utcnow)
+    @staticmethod
+    def _close(queue: asyncio.Queue):
+        """Replace whatever is buffered with the end-of-stream sentinel"""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
 
-# ============================================================================
-# AUTHENTICATION
-# ============================================================================
+    async def _run(self):
+        try:
+            self._counters = await read_analytics_counters()
+            try:
+                await self._watch()
+            except (OperationFailure, NotImplementedError) as e:
+                logger.info(f"Change streams unavailable ({e}); polling admin events every {self.poll_interval}s")
+            await self._poll()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Admin event consumer failed: {e}")
+            for queue in self.subscribers:
+                self._close(queue)
+            self.subscribers.clear()
+        finally:
+            self.mode = None
 
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    async def _watch(self):
+        while True:
+            try:
+                async with db.watch(ADMIN_EVENT_PIPELINE, full_document="updateLookup", resume_after=self._resume_token) as stream:
+                    self.mode = "changeStream"
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        self._on_change(change)
+            except OperationFailure:
+                # Not supported at all: let _run fall back to polling
+                if self.mode is None:
+                    raise
+                self._resume_token = None
+                logger.error("Admin event change stream failed, restarting", exc_info=True)
+            except PyMongoError as e:
+                logger.error(f"Admin event change stream interrupted, resuming: {e}")
+            await asyncio.sleep(1)
 
-def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except jwt.PyJWTError:
-        return None
+    def _on_change(self, change: Dict[str, Any]):
+        document = change.get("fullDocument")
+        if change["ns"]["coll"] == "analytics_counters":
+            if document and document["_id"] == ANALYTICS_COUNTERS_ID:
+                self._counters_changed(document)
+        elif change["operationType"] == "delete":
+            self.publish("contact.deleted", {"id": str(change["documentKey"]["_id"])})
+        elif document:
+            self.publish("contact.created" if change["operationType"] == "insert" else "contact.updated", serialize_doc(document))
 
-async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    payload = verify_token(token)
-    
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
-    
-    admin = await db.admin_users.find_one({"email": payload.get("sub")})
-    if not admin:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Admin user not found"
+    def _counters_changed(self, document: Dict[str, Any]):
+        counters = {field: document.get(field, 0) for field in ANALYTICS_COUNTER_FIELDS}
+        previous = self._counters or {}
+        deltas = {field: value - previous.get(field, 0) for field, value in counters.items() if value != previous.get(field, 0)}
+        self._counters = counters
+        if deltas:
+            self.publish("counters", {"totals": counters, "deltas": deltas})
+
+    def _first_sighting(self, key) -> bool:
+        if key in self._seen:
+            return False
+        self._seen[key] = None
+        while len(self._seen) > 10000:
+            self._seen.popitem(last=False)
+        return True
+
+    async def _poll(self):
+        self.mode = "polling"
+        # Only report contacts that arrive from now on
+        feeds = [
+            await self._poll_feed_start("submittedAt", "contact.created"),
+            await self._poll_feed_start("updatedAt", "contact.updated"),
+        ]
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            counters = await db.analytics_counters.find_one({"_id": ANALYTICS_COUNTERS_ID})
+            for feed in feeds:
+                await self._poll_feed(feed)
+            if counters:
+                self._counters_changed(counters)
+
+    async def _poll_feed_start(self, field: str, event: str) -> Dict[str, Any]:
+        window = utc_now() - ADMIN_EVENT_POLL_OVERLAP
+        recent = await db.contact_submissions.find({field: {"$gte": window}}, {field: 1}).sort([(field, 1), ("_id", 1)]).to_list(None)
+        for doc in recent:
+            self._first_sighting((event, doc["_id"], doc[field]))
+        return {
+            "field": field,
+            "event": event,
+            "cursor": (recent[-1][field], recent[-1]["_id"]) if recent else (window, ObjectId("0" * 24)),
+            # _id -> field value of what was sent within the overlap window
+            "recent": {doc["_id"]: doc[field] for doc in recent},
+        }
+
+    async def _poll_feed(self, feed: Dict[str, Any]):
+        """Publish contacts whose ``field`` moved past the feed's (value, _id) cursor.
+
+        The keyset seek reads only documents not sent yet. Inserts can land
+        stamped earlier than ones already sent, so the window behind the
+        cursor is counted too (an index-only count) and only re-read when
+        that count differs from what was sent from it.
+        """
+        field, (value, last_id) = feed["field"], feed["cursor"]
+        window = utc_now() - ADMIN_EVENT_POLL_OVERLAP
+        recent = feed["recent"] = {_id: stamp for _id, stamp in feed["recent"].items() if stamp >= window}
+        behind = {field: {"$gte": window, "$lte": value}}
+        seek = {"$or": [{field: {"$gt": value}}, {field: value, "_id": {"$gt": last_id}}]}
+        docs, behind_count = await asyncio.gather(
+            db.contact_submissions.find(seek).sort([(field, 1), ("_id", 1)]).to_list(None),
+            db.contact_submissions.count_documents(behind),
         )
-    
-    return serialize_doc(admin)
+        if behind_count != sum(1 for stamp in recent.values() if stamp <= value):
+            late = await db.contact_submissions.find(behind).sort([(field, 1), ("_id", 1)]).to_list(None)
+            # Rebuilt from what is there now, dropping deleted or since-updated contacts
+            recent = feed["recent"] = {}
+            docs = late + docs
+        for doc in docs:
+            key = (doc[field], doc["_id"])
+            recent[doc["_id"]] = doc[field]
+            feed["cursor"] = max(feed["cursor"], key)
+            if self._first_sighting((feed["event"], doc["_id"], doc[field])):
+                self.publish(feed["event"], serialize_doc(doc))
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+admin_event_hub = AdminEventHub(poll_interval=ADMIN_EVENTS_POLL_SECONDS, queue_size=ADMIN_EVENTS_QUEUE_SIZE)
 
 # ============================================================================
 # PUBLIC ROUTES
 # ============================================================================
 
+@api_router.get("/health")
+async def health_check(response: Response):
+    """Liveness/readiness: MongoDB ping latency and connection pool utilization"""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout=MONGO_SERVER_SELECTION_TIMEOUT_MS / 1000)
+        mongo = {"status": "ok", "pingMs": round((time.perf_counter() - started) * 1000, 3)}
+    except Exception as e:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        mongo = {"status": "unavailable", "error": str(e) or type(e).__name__}
+    return {
+        "status": mongo["status"],
+        "mongo": {
+            **mongo,
+            "pool": mongo_pool_metrics.stats(),
+            "readPreference": {
+                "public": MONGO_PUBLIC_READ_PREFERENCE,
+                "admin": "primary",
+                "primaryAfterWriteSeconds": MONGO_PUBLIC_PRIMARY_AFTER_WRITE_SECONDS,
+            },
+        },
+    }
+
 @api_router.get("/")
 async def root():
     return {"message": "Christopher Merrick Database Consulting API"}
 
+BLOG_SUMMARY_FIELDS = ["title", "slug", "excerpt", "category", "readTime", "publishDate"]
+BLOG_SUMMARY_ALLOWED_FIELDS = [name for name in BlogPostSummary.model_fields if name != "id"]
+
+async def list_published_posts(request: Request, response: Response, view: Any, projection: Dict[str, Any], skip: int, limit: int, cursor: Optional[str]):
+    """Cached, conditional page of published posts with ``projection`` pushed down to the find"""
+    cache_key = ("list", view, skip, limit, cursor)
+    not_modified = await conditional_get(request, response, "blog", cache_key, public_reads("blog").blog_posts, {"published": True})
+    if not_modified:
+        return not_modified
+    
+    async def load():
+        posts = await find_page(
+            public_reads("blog").blog_posts, {"published": True}, "publishDate", skip, limit, cursor, projection=projection
+        ).to_list(limit)
+        return [serialize_doc(post) for post in posts]
+    
+    posts = await cached_response("blog", cache_key, load)
+    set_next_cursor(response, posts, "publishDate", limit)
+    return list_response(response, posts)
+
 @api_router.get("/blog", response_model=List[BlogPost])
-async def get_blog_posts(skip: int = 0, limit: int = 10):
-    """Get published blog posts with pagination"""
-    posts = await db.blog_posts.find(
-        {"published": True}
-    ).sort("publishDate", -1).skip(skip).limit(limit).to_list(limit)
+async def get_blog_posts(request: Request, response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
+    """Get published blog posts with skip/limit or cursor pagination"""
+    return await list_published_posts(
+        request, response, "full", {field: 0 for field in RENDERED_FIELDS}, skip, limit, cursor
+    )
+
+@api_router.get("/blog/summaries", response_model=List[BlogPostSummary], response_model_exclude_unset=True)
+async def get_blog_post_summaries(request: Request, response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Get lightweight published blog post cards; ``fields`` is a comma-separated subset to return"""
+    requested = [name.strip() for name in fields.split(",") if name.strip()] if fields else BLOG_SUMMARY_FIELDS
+    unknown = sorted(set(requested) - set(BLOG_SUMMARY_ALLOWED_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(BLOG_SUMMARY_ALLOWED_FIELDS)}"
+        )
+    
+    # publishDate is always projected: it is the pagination key
+    selected = tuple(sorted(set(requested) | {"publishDate"}))
+    return await list_published_posts(
+        request, response, ("summary", selected), {name: 1 for name in selected}, skip, limit, cursor
+    )
+
+@api_router.get("/blog/search")
+async def search_blog(q: str, skip: int = 0, limit: int = 10):
+    """Full-text search over published blog posts, ranked by relevance"""
+    query = q.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+    if len(query) > SEARCH_MAX_QUERY_CHARS:
+        raise HTTPException(status_code=400, detail=f"Search query must be at most {SEARCH_MAX_QUERY_CHARS} characters")
+    if not 0 <= skip <= SEARCH_MAX_SKIP:
+        raise HTTPException(status_code=400, detail=f"skip must be between 0 and {SEARCH_MAX_SKIP}")
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
     
-    return [serialize_doc(post) for post in posts]
+    return await cached_response("blog", ("search", query.lower(), skip, limit), lambda: search_blog_posts(query, skip, limit), cache=search_cache)
 
 @api_router.get("/blog/{slug}", response_model=BlogPost)
-async def get_blog_post(slug: str):
-    """Get single blog post by slug"""
-    post = await db.blog_posts.find_one({"slug": slug, "published": True})
+async def get_blog_post(slug: str, request: Request, response: Response, render: bool = False):
+    """Get single blog post by slug, optionally with pre-rendered HTML and table of contents"""
+    not_modified = await conditional_get(request, response, "blog", ("post", slug, render), public_reads("blog").blog_posts, {"slug": slug, "published": True})
+    if not_modified:
+        return not_modified
+    
+    async def load():
+        post = await public_reads("blog").blog_posts.find_one({"slug": slug, "published": True})
+        return serialize_doc(ensure_rendered(post))
+    
+    post = await cached_response("blog", ("post", slug), load)
     if not post:
         raise HTTPException(status_code=404, detail="Blog post not found")
-    return serialize_doc(post)
+    if render:
+        return post
+    return {field: value for field, value in post.items() if field not in RENDERED_FIELDS}
 
 @api_router.get("/testimonials", response_model=List[Testimonial])
-async def get_testimonials():
+async def get_testimonials(request: Request, response: Response):
     """Get published testimonials"""
-    testimonials = await db.testimonials.find(
-        {"published": True}
-    ).sort("createdAt", -1).to_list(100)
+    not_modified = await conditional_get(request, response, "testimonials", "list", public_reads("testimonials").testimonials, {"published": True})
+    if not_modified:
+        return not_modified
     
-    return [serialize_doc(testimonial) for testimonial in testimonials]
+    async def load():
+        testimonials = await public_reads("testimonials").testimonials.find(
+            {"published": True}
+        ).sort("createdAt", -1).to_list(100)
+        return [serialize_doc(testimonial) for testimonial in testimonials]
+    
+    return list_response(response, await cached_response("testimonials", "list", load))
 
 @api_router.get("/services", response_model=List[Service])
-async def get_services():
+async def get_services(request: Request, response: Response):
     """Get published services"""
-    services = await db.services.find(
-        {"published": True}
-    ).sort("order", 1).to_list(100)
+    not_modified = await conditional_get(request, response, "services", "list", public_reads("services").services, {"published": True})
+    if not_modified:
+        return not_modified
+    
+    async def load():
+        services = await public_reads("services").services.find(
+            {"published": True}
+        ).sort("order", 1).to_list(100)
+        return [serialize_doc(service) for service in services]
     
-    return [serialize_doc(service) for service in services]
+    return list_response(response, await cached_response("services", "list", load))
 
 @api_router.post("/contact")
-async def submit_contact_form(contact: ContactSubmissionCreate):
-    """Submit contact form"""
+async def submit_contact_form(contact: ContactSubmissionCreate, response: Response):
+    """Submit contact form; accepted with 202 and stored by the ingestion worker"""
     contact_dict = contact.dict()
-    contact_dict["submittedAt"] = datetime.utcnow()
+    contact_dict["_id"] = ObjectId()
+    contact_dict["submittedAt"] = utc_now()
     contact_dict["status"] = "new"
     
-    result = await db.contact_submissions.insert_one(contact_dict)
+    if INGEST_WRITE_BEHIND and await ingestion_queue.submit("contact", contact_dict):
+        response.status_code = status.HTTP_202_ACCEPTED
+    else:
+        await write_contact_submissions([contact_dict])
     
     return {
         "success": True,
         "message": "Thank you for your message. We'll get back to you within 24 hours.",
-        "id": str(result.inserted_id)
+        "id": str(contact_dict["_id"])
     }
 
 @api_router.post("/newsletter")
-async def subscribe_newsletter(subscription: NewsletterSubscription):
-    """Newsletter subscription"""
-    # Check if email already exists
-    existing = await db.newsletter_subscriptions.find_one({"email": subscription.email})
-    if existing:
-        return {"success": True, "message": "Email already subscribed"}
-    
-    # Insert new subscription
+async def subscribe_newsletter(subscription: NewsletterSubscription, response: Response):
+    """Newsletter subscription; accepted with 202 and deduplicated by the ingestion worker"""
     subscription_dict = subscription.dict()
-    result = await db.newsletter_subscriptions.insert_one(subscription_dict)
     
-    return {
-        "success": True,
-        "message": "Successfully subscribed to newsletter",
-        "id": str(result.inserted_id)
-    }
+    if INGEST_WRITE_BEHIND and await ingestion_queue.submit("newsletter", subscription_dict):
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"success": True, "message": "Subscription received"}
+    
+    if not await write_newsletter_subscriptions([subscription_dict]):
+        return {"success": True, "message": "Email already subscribed"}
+    return {"success": True, "message": "Successfully subscribed to newsletter"}
     
 # ============================================================================
 # ADMIN ROUTES
@@ -275,7 +3332,7 @@ async def subscribe_newsletter(subscription: NewsletterSubscription):
 async def login(login_data: AdminLogin):
     """Admin login"""
     admin = await db.admin_users.find_one({"email": login_data.email})
-    if not admin or not verify_password(login_data.password, admin["passwordHash"]):
+    if not admin or not await password_hasher.verify(login_data.password, admin["passwordHash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -297,172 +3354,439 @@ async def get_current_user(current_admin = Depends(get_current_admin)):
 
 # Blog Management
 @api_router.get("/admin/blog", response_model=List[BlogPost])
-async def get_all_blog_posts(current_admin = Depends(get_current_admin), skip: int = 0, limit: int = 50):
+async def get_all_blog_posts(response: Response, current_admin = Depends(get_current_admin), skip: int = 0, limit: int = 50, cursor: Optional[str] = None):
     """Get all blog posts including drafts"""
-    posts = await db.blog_posts.find().sort("createdAt", -1).skip(skip).limit(limit).to_list(limit)
-    return [serialize_doc(post) for post in posts]
+    posts = await find_page(
+        db.blog_posts, {}, "createdAt", skip, limit, cursor,
+        projection={field: 0 for field in RENDERED_FIELDS}
+    ).to_list(limit)
+    set_next_cursor(response, posts, "createdAt", limit)
+    return list_response(response, posts)
 
 @api_router.post("/admin/blog", response_model=BlogPost)
 async def create_blog_post(post: BlogPostCreate, current_admin = Depends(get_current_admin)):
     """Create new blog post"""
-    post_dict = post.dict()
-    post_dict["createdAt"] = datetime.utcnow()
-    post_dict["updatedAt"] = datetime.utcnow()
-    post_dict["publishDate"] = datetime.utcnow()
-    
-    result = await db.blog_posts.insert_one(post_dict)
-    created_post = await db.blog_posts.find_one({"_id": result.inserted_id})
+    check_blog_slug(post.slug)
+    try:
+        created_post = await blog_posts_repository.insert(with_rendered_content(post.dict()))
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="A blog post with this slug already exists")
+    await content_changed("blog")
+    await bump_analytics_counters(totalBlogPosts=_published_delta(None, created_post))
     return serialize_doc(created_post)
 
 @api_router.put("/admin/blog/{post_id}", response_model=BlogPost)
 async def update_blog_post(post_id: str, post: BlogPostCreate, current_admin = Depends(get_current_admin)):
     """Update blog post"""
-    post_dict = post.dict()
-    post_dict["updatedAt"] = datetime.utcnow()
-    
-    result = await db.blog_posts.update_one(
-        {"_id": ObjectId(post_id)},
-        {"$set": post_dict}
-    )
+    check_blog_slug(post.slug)
+    try:
+        previous, updated_post = await blog_posts_repository.update_with_previous(post_id, with_rendered_content(post.dict()))
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="A blog post with this slug already exists")
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Blog post not found")
     
-    updated_post = await db.blog_posts.find_one({"_id": ObjectId(post_id)})
+    await content_changed("blog")
+    await bump_analytics_counters(totalBlogPosts=_published_delta(previous, updated_post))
     return serialize_doc(updated_post)
 
 @api_router.delete("/admin/blog/{post_id}")
 async def delete_blog_post(post_id: str, current_admin = Depends(get_current_admin)):
     """Delete blog post"""
-    result = await db.blog_posts.delete_one({"_id": ObjectId(post_id)})
-    if result.deleted_count == 0:
+    deleted = await blog_posts_repository.delete(post_id, projection={"published": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Blog post not found")
+    await content_changed("blog")
+    await bump_analytics_counters(totalBlogPosts=_published_delta(deleted, None))
     return {"success": True, "message": "Blog post deleted"}
 
+@api_router.post("/admin/blog/bulk")
+async def bulk_update_blog_posts(bulk: BulkPublishAction, current_admin = Depends(get_current_admin)):
+    """Publish, unpublish or delete several blog posts at once"""
+    if bulk.action not in BULK_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"action must be one of: {', '.join(BULK_ACTIONS)}")
+    check_bulk_size(bulk.ids)
+    
+    results, applied = await bulk_apply(db.blog_posts, bulk.ids, bulk_publish_operation(bulk.action), {"published": 1})
+    if applied:
+        await content_changed("blog")
+        await bump_analytics_counters(totalBlogPosts=bulk_published_delta(bulk.action, applied))
+    return bulk_summary(results)
+
+@api_router.post("/admin/blog/import")
+async def import_blog_posts(file: UploadFile = File(...), current_admin = Depends(get_current_admin)):
+    """Import blog posts from a JSON array or NDJSON upload"""
+    items = parse_import_items(await file.read())
+    check_bulk_size(items)
+    
+    results, operations, operation_items = [], [], []
+    for index, item in enumerate(items):
+        result = {"index": index, "success": False}
+        results.append(result)
+        try:
+            post_dict = BlogPostCreate(**item).dict()
+        except ValidationError as e:
+            result["error"] = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            continue
+        except TypeError:
+            result["error"] = "Item is not an object"
+            continue
+        if post_dict["slug"] in RESERVED_BLOG_SLUGS:
+            result["error"] = f"slug: {post_dict['slug']!r} is reserved"
+            continue
+        post_dict = blog_posts_repository.new_document(with_rendered_content(post_dict))
+        result.update({"id": str(post_dict["_id"]), "slug": post_dict["slug"]})
+        operations.append(InsertOne(post_dict))
+        operation_items.append((index, post_dict))
+    
+    errors = await bulk_write_errors(db.blog_posts, operations)
+    published = 0
+    for position, (index, post_dict) in enumerate(operation_items):
+        if position in errors:
+            del results[index]["id"]
+            results[index]["error"] = errors[position]
+        else:
+            results[index]["success"] = True
+            published += _published_delta(None, post_dict)
+    
+    if len(errors) < len(operations):
+        await content_changed("blog")
+        await bump_analytics_counters(totalBlogPosts=published)
+    return bulk_summary(results)
+
 # Testimonial Management
 @api_router.get("/admin/testimonials", response_model=List[Testimonial])
-async def get_all_testimonials(current_admin = Depends(get_current_admin)):
+async def get_all_testimonials(response: Response, current_admin = Depends(get_current_admin)):
     """Get all testimonials"""
     testimonials = await db.testimonials.find().sort("createdAt", -1).to_list(100)
-    return [serialize_doc(testimonial) for testimonial in testimonials]
+    return list_response(response, testimonials)
 
 @api_router.post("/admin/testimonials", response_model=Testimonial)
 async def create_testimonial(testimonial: TestimonialCreate, current_admin = Depends(get_current_admin)):
     """Create testimonial"""
-    testimonial_dict = testimonial.dict()
-    testimonial_dict["createdAt"] = datetime.utcnow()
-    testimonial_dict["updatedAt"] = datetime.utcnow()
-    
-    result = await db.testimonials.insert_one(testimonial_dict)
-    created_testimonial = await db.testimonials.find_one({"_id": result.inserted_id})
+    created_testimonial = await testimonials_repository.insert(testimonial.dict())
+    await content_changed("testimonials")
+    await bump_analytics_counters(totalTestimonials=_published_delta(None, created_testimonial))
     return serialize_doc(created_testimonial)
 
 @api_router.put("/admin/testimonials/{testimonial_id}", response_model=Testimonial)
 async def update_testimonial(testimonial_id: str, testimonial: TestimonialCreate, current_admin = Depends(get_current_admin)):
     """Update testimonial"""
-    testimonial_dict = testimonial.dict()
-    testimonial_dict["updatedAt"] = datetime.utcnow()
-    
-    result = await db.testimonials.update_one(
-        {"_id": ObjectId(testimonial_id)},
-        {"$set": testimonial_dict}
-    )
+    previous, updated_testimonial = await testimonials_repository.update_with_previous(testimonial_id, testimonial.dict())
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Testimonial not found")
     
-    updated_testimonial = await db.testimonials.find_one({"_id": ObjectId(testimonial_id)})
+    await content_changed("testimonials")
+    await bump_analytics_counters(totalTestimonials=_published_delta(previous, updated_testimonial))
     return serialize_doc(updated_testimonial)
 
 @api_router.delete("/admin/testimonials/{testimonial_id}")
 async def delete_testimonial(testimonial_id: str, current_admin = Depends(get_current_admin)):
     """Delete testimonial"""
-    result = await db.testimonials.delete_one({"_id": ObjectId(testimonial_id)})
-    if result.deleted_count == 0:
+    deleted = await testimonials_repository.delete(testimonial_id, projection={"published": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    await content_changed("testimonials")
+    await bump_analytics_counters(totalTestimonials=_published_delta(deleted, None))
     return {"success": True, "message": "Testimonial deleted"}
 
+@api_router.post("/admin/testimonials/bulk")
+async def bulk_update_testimonials(bulk: BulkPublishAction, current_admin = Depends(get_current_admin)):
+    """Publish, unpublish or delete several testimonials at once"""
+    if bulk.action not in BULK_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"action must be one of: {', '.join(BULK_ACTIONS)}")
+    check_bulk_size(bulk.ids)
+    
+    results, applied = await bulk_apply(db.testimonials, bulk.ids, bulk_publish_operation(bulk.action), {"published": 1})
+    if applied:
+        await content_changed("testimonials")
+        await bump_analytics_counters(totalTestimonials=bulk_published_delta(bulk.action, applied))
+    return bulk_summary(results)
+
 # Contact Management
 @api_router.get("/admin/contacts")
-async def get_contact_submissions(current_admin = Depends(get_current_admin), skip: int = 0, limit: int = 50):
+async def get_contact_submissions(response: Response, current_admin = Depends(get_current_admin), skip: int = 0, limit: int = 50, cursor: Optional[str] = None):
     """Get contact submissions"""
-    contacts = await db.contact_submissions.find().sort("submittedAt", -1).skip(skip).limit(limit).to_list(limit)
-    return [serialize_doc(contact) for contact in contacts]
+    contacts = await find_page(db.contact_submissions, {}, "submittedAt", skip, limit, cursor).to_list(limit)
+    set_next_cursor(response, contacts, "submittedAt", limit)
+    return list_response(response, contacts)
 
 @api_router.put("/admin/contacts/{contact_id}")
 async def update_contact_status(contact_id: str, status: str, notes: Optional[str] = None, current_admin = Depends(get_current_admin)):
     """Update contact status and notes"""
-    update_data = {"status": status}
+    object_id = Repository.object_id(contact_id)
+    if object_id is None:
+        raise HTTPException(status_code=404, detail="Contact submission not found")
+    
+    update_data = {"status": status, "updatedAt": utc_now()}
     if notes:
         update_data["notes"] = notes
     
-    result = await db.contact_submissions.update_one(
-        {"_id": ObjectId(contact_id)},
-        {"$set": update_data}
+    previous = await db.contact_submissions.find_one_and_update(
+        {"_id": object_id},
+        {"$set": update_data},
+        projection={"status": 1, "submittedAt": 1}
     )
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Contact submission not found")
     
+    await asyncio.gather(
+        bump_analytics_counters(newContacts=int(status == "new") - int(previous.get("status") == "new")),
+        record_contact_status_rollup(previous, status),
+    )
+    
     return {"success": True, "message": "Contact updated"}
 
+@api_router.post("/admin/contacts/bulk-status")
+async def bulk_update_contact_status(bulk: BulkContactStatusUpdate, current_admin = Depends(get_current_admin)):
+    """Update the status (and optionally notes) of several contact submissions"""
+    check_bulk_size(bulk.ids)
+    update_data = {"status": bulk.status, "updatedAt": utc_now()}
+    if bulk.notes:
+        update_data["notes"] = bulk.notes
+    
+    results, applied = await bulk_apply(
+        db.contact_submissions,
+        bulk.ids,
+        lambda object_id: UpdateOne({"_id": object_id}, {"$set": update_data}),
+        {"status": 1, "submittedAt": 1}
+    )
+    await asyncio.gather(
+        bump_analytics_counters(newContacts=sum(
+            int(bulk.status == "new") - int(previous.get("status") == "new") for previous in applied
+        )),
+        record_contact_status_rollups(applied, bulk.status),
+    )
+    return bulk_summary(results)
+
+@api_router.get("/admin/export/contacts")
+async def export_contact_submissions(
+    format: str = "csv",
+    status: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = EXPORT_DEFAULT_BATCH_SIZE,
+    current_admin = Depends(get_current_admin)
+):
+    """Stream contact submissions as CSV or NDJSON, optionally filtered by status and submittedAt range"""
+    query = date_range_query("submittedAt", start, end)
+    if status:
+        query["status"] = status
+    return export_response(db.contact_submissions, query, "submittedAt", CONTACT_EXPORT_COLUMNS, format, batch_size, "contacts")
+
+@api_router.get("/admin/export/newsletter")
+async def export_newsletter_subscriptions(
+    format: str = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = EXPORT_DEFAULT_BATCH_SIZE,
+    current_admin = Depends(get_current_admin)
+):
+    """Stream newsletter subscribers as CSV or NDJSON, optionally filtered by subscribedAt range"""
+    query = date_range_query("subscribedAt", start, end)
+    return export_response(db.newsletter_subscriptions, query, "subscribedAt", NEWSLETTER_EXPORT_COLUMNS, format, batch_size, "newsletter")
+
+# Live Updates
+@api_router.post("/admin/events/ticket")
+async def create_event_stream_ticket(current_admin = Depends(get_current_admin)):
+    """Issue a short-lived, single-use ticket for GET /admin/events?ticket=..."""
+    ticket = await issue_stream_ticket(current_admin["email"])
+    return {"ticket": ticket, "expiresIn": STREAM_TICKET_TTL_SECONDS}
+
+@api_router.get("/admin/events")
+async def stream_admin_events(current_admin = Depends(get_current_admin_for_stream)):
+    """Server-Sent Events for the dashboard: contact.created, contact.updated,
+    contact.deleted and counters (totals and deltas), after an initial ready event"""
+    async def events():
+        queue = admin_event_hub.subscribe()
+        try:
+            yield b"retry: 3000\n\n" + sse_message("ready", {"totals": await read_analytics_counters()})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), ADMIN_EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            admin_event_hub.unsubscribe(queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Service Management
 @api_router.get("/admin/services", response_model=List[Service])
-async def get_all_services(current_admin = Depends(get_current_admin)):
+async def get_all_services(response: Response, current_admin = Depends(get_current_admin)):
     """Get all services"""
     services = await db.services.find().sort("order", 1).to_list(100)
-    return [serialize_doc(service) for service in services]
+    return list_response(response, services)
 
 @api_router.put("/admin/services/{service_id}", response_model=Service)
 async def update_service(service_id: str, service: ServiceUpdate, current_admin = Depends(get_current_admin)):
     """Update service"""
     service_dict = {k: v for k, v in service.dict().items() if v is not None}
-    service_dict["updatedAt"] = datetime.utcnow()
-    
-    result = await db.services.update_one(
-        {"_id": ObjectId(service_id)},
-        {"$set": service_dict}
-    )
+    updated_service = await services_repository.update(service_id, service_dict)
     
-    if result.matched_count == 0:
+    if updated_service is None:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    updated_service = await db.services.find_one({"_id": ObjectId(service_id)})
+    await content_changed("services")
     return serialize_doc(updated_service)
 
 # Analytics
 @api_router.get("/admin/analytics")
 async def get_analytics(current_admin = Depends(get_current_admin)):
     """Get basic analytics"""
-    total_contacts = await db.contact_submissions.count_documents({})
-    new_contacts = await db.contact_submissions.count_documents({"status": "new"})
-    total_testimonials = await db.testimonials.count_documents({"published": True})
-    total_blog_posts = await db.blog_posts.count_documents({"published": True})
-    newsletter_subscribers = await db.newsletter_subscriptions.count_documents({})
-    
-    # Recent contacts
-    recent_contacts = await db.contact_submissions.find().sort("submittedAt", -1).limit(5).to_list(5)
+    totals, recent_contacts = await asyncio.gather(
+        read_analytics_counters(),
+        db.contact_submissions.find().sort("submittedAt", -1).limit(5).to_list(5),
+    )
     
     return {
-        "totalContacts": total_contacts,
-        "newContacts": new_contacts,
-        "totalTestimonials": total_testimonials,
-        "totalBlogPosts": total_blog_posts,
-        "newsletterSubscribers": newsletter_subscribers,
+        **totals,
         "recentContacts": [serialize_doc(contact) for contact in recent_contacts]
     }
 
+@api_router.get("/admin/analytics/timeseries")
+async def get_analytics_timeseries(
+    interval: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_admin = Depends(get_current_admin)
+):
+    """Get contact submissions and newsletter signups per day/week/month"""
+    if interval not in ROLLUP_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of: {', '.join(ROLLUP_INTERVALS)}")
+    end = _utc_day(end or datetime.utcnow())
+    start = _utc_day(start) if start else end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= TIMESERIES_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"The range may cover at most {TIMESERIES_MAX_DAYS} days")
+    
+    return {
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "buckets": await analytics_timeseries(start, end, interval)
+    }
+
+@api_router.post("/admin/analytics/rollups/rebuild")
+async def rebuild_analytics_rollups_route(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_admin = Depends(get_current_admin)
+):
+    """Recompute the daily analytics rollups from the source collections"""
+    days = await rebuild_analytics_rollups(start, end)
+    return {"success": True, "days": days}
+
+@api_router.get("/admin/indexes/audit")
+async def get_index_audit(current_admin = Depends(get_current_admin)):
+    """Explain every query shape the API issues and flag collection scans"""
+    return await audit_indexes()
+
+def collect_app_metrics():
+    """Scrape-time gauges from the caches, bcrypt pool and ingestion queue"""
+    cache_samples = {"hits": [], "misses": [], "evictions": [], "entries": []}
+    for cache_name, cache in (("responses", response_cache), ("search", search_cache), ("auth", auth_cache), ("markdown", render_cache)):
+        stats = cache.stats()
+        for key in cache_samples:
+            cache_samples[key].append(((("cache", cache_name),), stats[key]))
+    hasher = password_hasher.stats()
+    ingestion = ingestion_queue.stats()
+    pool = mongo_pool_metrics.stats()
+    admission = admission_controller.stats()
+    admin_events = admin_event_hub.stats()
+    return [
+        ("app_cache_hits_total", "counter", "Cache hits", cache_samples["hits"]),
+        ("app_cache_misses_total", "counter", "Cache misses", cache_samples["misses"]),
+        ("app_cache_evictions_total", "counter", "Cache LRU evictions", cache_samples["evictions"]),
+        ("app_cache_entries", "gauge", "Entries currently cached", cache_samples["entries"]),
+        ("app_password_hasher_pending", "gauge", "bcrypt calls running or queued", [((), hasher["pending"])]),
+        ("app_password_hasher_saturation", "gauge", "bcrypt pending calls / max pending", [((), hasher["saturation"])]),
+        ("app_password_hasher_rejected_total", "counter", "bcrypt calls rejected at the queue limit", [((), hasher["rejected"])]),
+        ("app_ingestion_queue_depth", "gauge", "Submissions waiting to be written", [((), ingestion["depth"])]),
+        ("app_ingestion_flushed_total", "counter", "Submissions written by the ingestion worker", [((), ingestion["flushed"])]),
+        ("app_ingestion_last_flush_seconds", "gauge", "Duration of the last ingestion flush", [((), ingestion["lastFlushMs"] / 1000)]),
+        ("mongo_pool_connections", "gauge", "MongoDB connections by server and state", [
+            ((("server", address), ("state", state)), server[state])
+            for address, server in pool["servers"].items() for state in ("open", "checkedOut", "waiting")
+        ]),
+        ("app_requests_shed_total", "counter", "Requests rejected by load shedding", [((), admission["shed"])]),
+        ("app_requests_rate_limited_total", "counter", "Requests rejected by rate limits", [((), admission["rateLimited"])]),
+        ("app_event_loop_lag_seconds", "gauge", "Smoothed event loop lag", [((), admission["loopLagMs"] / 1000)]),
+        ("app_admin_event_subscribers", "gauge", "Admins connected to the live event stream", [((), admin_events["subscribers"])]),
+        ("app_admin_events_dropped_total", "counter", "Event stream clients disconnected for falling behind", [((), admin_events["dropped"])]),
+        ("mongo_pool_checkout_failures_total", "counter", "Failed MongoDB connection checkouts", [
+            ((("server", address),), server["checkoutFailures"]) for address, server in pool["servers"].items()
+        ]),
+    ]
+
+metrics.add_collector(collect_app_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus text exposition of request, MongoDB and application metrics"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api_router.post("/admin/static/publish")
+async def publish_static_site(force: bool = False, current_admin = Depends(get_current_admin)):
+    """Regenerate the static snapshot of public content now"""
+    if static_publisher.output_dir is None:
+        raise HTTPException(status_code=400, detail="Static publishing is not configured (set STATIC_OUTPUT_DIR)")
+    return await static_publisher.publish(force=force)
+
+@api_router.get("/admin/traces/slow")
+async def get_slow_requests(admin: dict = Depends(get_current_admin)):
+    """Most recent requests over SLOW_REQUEST_MS with their span trees, newest first"""
+    return list(reversed(slow_requests))
+
+@api_router.get("/admin/admission/stats")
+async def get_admission_stats(admin: dict = Depends(get_current_admin)):
+    """In-flight requests, load shedding and rate limiting counters"""
+    return admission_controller.stats()
+
+@api_router.get("/admin/ingestion/stats")
+async def get_ingestion_stats(current_admin = Depends(get_current_admin)):
+    """Get write-behind queue depth and flush latency"""
+    return ingestion_queue.stats()
+
+@api_router.get("/admin/password-hasher/stats")
+async def get_password_hasher_stats(current_admin = Depends(get_current_admin)):
+    """Get bcrypt worker pool utilisation and saturation"""
+    return password_hasher.stats()
+
+@api_router.get("/admin/cache/stats")
+async def get_cache_stats(current_admin = Depends(get_current_admin)):
+    """Get response and auth cache hit/miss/eviction counters and cross-worker sync stats"""
+    return {"responses": response_cache.stats(), "search": search_cache.stats(), "auth": auth_cache.stats(), "sync": cache_sync.stats()}
+
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=["*"],
+    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER],
 )
 
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -472,21 +3796,103 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if analytics_reconcile_task:
+        analytics_reconcile_task.cancel()
+    load_monitor.stop()
+    cache_sync.stop()
+    admin_event_hub.close()
+    await ingestion_queue.stop()
     client.close()
+    password_hasher.shutdown()
+
+async def warm_mongo_pool():
+    """Open MONGO_WARMUP_CONNECTIONS connections up front with concurrent pings"""
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(max(1, MONGO_WARMUP_CONNECTIONS))))
+    except Exception as e:
+        logger.error(f"MongoDB pool warm-up failed: {e}")
+        return
+    logger.info(f"Warmed MongoDB pool with {MONGO_WARMUP_CONNECTIONS} connections in {(time.perf_counter() - started) * 1000:.1f}ms")
 
 # Initialize default data
 @app.on_event("startup")
 async def initialize_data():
-    """Initialize default admin user and sample data"""
+    """Initialize indexes, default data and background workers"""
+    global analytics_reconcile_task
+    await warm_mongo_pool()
+    if CACHE_SYNC_ENABLED:
+        await cache_sync.ensure_collection()
+        await cache_sync.start()
+    
+    await run_startup_migrations()
+    # Replaying orphaned spools is idempotent, so workers needn't coordinate it
+    if INGEST_WRITE_BEHIND:
+        await ingestion_queue.start()
+    
+    analytics_reconcile_task = asyncio.create_task(reconcile_analytics_periodically())
+    load_monitor.start()
+
+# Bump when seed_default_data changes; index changes are picked up from
+# REQUIRED_INDEXES automatically
+SEED_DATA_VERSION = 1
+_process_started_at = utc_now()
+
+def startup_migration_version() -> str:
+    indexes = {name: [index.document for index in models] for name, models in REQUIRED_INDEXES.items()}
+    spec = json.dumps({"seed": SEED_DATA_VERSION, "indexes": indexes}, sort_keys=True, default=str)
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()
+
+async def run_startup_migrations():
+    """Build indexes and seed default data once per migration version.
+
+    Workers start together; the first to take the startup lock does the work
+    and records a marker in the migrations collection. The others wait on the
+    lock (the holder keeps renewing it, however long index builds take), then
+    find the marker and skip. If the holder dies, its lease expires and the
+    next worker runs the migration instead.
+
+    Indexes that fail to build (e.g. duplicates blocking a unique index) are
+    recorded on the marker, which then doesn't count as done: the next
+    startup retries, though workers starting alongside the failed attempt
+    don't repeat it.
+    """
+    version = startup_migration_version()
+    if await db.migrations.find_one({"_id": "startup", "version": version, "failedIndexes": {"$exists": False}}, {"_id": 1}):
+        return
+    async with MongoLock("startup-migration", lease_seconds=STARTUP_LOCK_LEASE_SECONDS) as lock:
+        previous = await db.migrations.find_one({"_id": "startup", "version": version})
+        if previous and (not previous.get("failedIndexes") or previous["completedAt"] >= _process_started_at):
+            return
+        started = time.perf_counter()
+        failed = await ensure_indexes()
+        await seed_default_data()
+        # Seeding bypasses the counter hooks, so start from real counts
+        await reconcile_analytics_counters()
+        marker = {"version": version, "completedAt": utc_now(), "by": lock.owner}
+        await db.migrations.update_one(
+            {"_id": "startup"},
+            {"$set": {**marker, "failedIndexes": failed}} if failed else {"$set": marker, "$unset": {"failedIndexes": ""}},
+            upsert=True
+        )
+        if failed:
+            logger.error(f"Startup migration {version[:12]} could not build indexes on {', '.join(failed)}; "
+                         "fix the data and restart to retry")
+        else:
+            logger.info(f"Ran startup migration {version[:12]} in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+async def seed_default_data():
+    """Create the default admin user and sample content when missing"""
     # Create default admin user if none exists
     existing_admin = await db.admin_users.find_one({"email": "admin@christophermerrick.co.uk"})
     if not existing_admin:
         default_admin = AdminUser(
             email="admin@christophermerrick.co.uk",
-            passwordHash=hash_password("admin123"),
+            passwordHash=await password_hasher.hash("admin123"),
             name="Site Administrator"
         )
         await db.admin_users.insert_one(default_admin.dict())
+        await invalidate_admin(default_admin.email)
         logger.info("Created default admin user: admin@christophermerrick.co.uk / admin123")
     
     # Initialize services if none exist
@@ -611,24 +4017,3 @@ async def initialize_data():
         await db.blog_posts.insert_many(default_blog_posts)
         logger.info("Initialized sample blog posts")
 
-# Include the router in the main app
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
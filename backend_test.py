@@ -148,7 +148,8 @@ class BackendTester:
             
             response = requests.post(f"{self.base_url}/contact", json=contact_data, timeout=10)
             
-            if response.status_code == 200:
+            # 202 when the submission is queued for write-behind ingestion
+            if response.status_code in (200, 202):
                 data = response.json()
                 if data.get('success') and 'id' in data:
                     self.log_result("Contact Form Submission", True, f"Contact saved with ID: {data['id']}")
@@ -172,7 +173,8 @@ class BackendTester:
             
             response = requests.post(f"{self.base_url}/newsletter", json=subscription_data, timeout=10)
             
-            if response.status_code == 200:
+            # 202 when the subscription is queued for write-behind ingestion
+            if response.status_code in (200, 202):
                 data = response.json()
                 if data.get('success'):
                     self.log_result("Newsletter Subscription", True, data.get('message', 'Subscribed successfully'))
@@ -0,0 +1,32 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# server reads these at import time; the Motor client connects lazily, so no
+# MongoDB is needed for the pure-logic tests
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "unit_tests")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic; advance it with ``clock[0] += seconds``"""
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """In-memory mongomock-motor database standing in for both server.db and server.public_db"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    database = AsyncMongoMockClient()["unit_tests"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "public_db", database)
+    return database
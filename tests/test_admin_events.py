@@ -0,0 +1,117 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+
+import server
+from server import AdminEventHub
+
+
+@pytest.fixture
+def hub():
+    hub = AdminEventHub(poll_interval=1, queue_size=100)
+    hub.subscribers.add(asyncio.Queue(maxsize=100))
+    hub._counters = {field: 0 for field in server.ANALYTICS_COUNTER_FIELDS}
+    return hub
+
+
+def events(hub):
+    queue = next(iter(hub.subscribers))
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait().split(b"\n")[0].decode()[len("event: "):])
+    return messages
+
+
+def test_counter_changes_publish_totals_and_deltas(hub):
+    hub._counters_changed({"_id": "totals", "totalContacts": 3, "newContacts": 1})
+    hub._counters_changed({"_id": "totals", "totalContacts": 3, "newContacts": 1})
+    queue = next(iter(hub.subscribers))
+    assert queue.qsize() == 1
+    message = queue.get_nowait()
+    assert b'"deltas":{"totalContacts":3,"newContacts":1}' in message
+    assert hub._counters["totalContacts"] == 3
+
+
+def test_slow_subscribers_are_disconnected(hub):
+    slow = asyncio.Queue(maxsize=1)
+    hub.subscribers.add(slow)
+    hub.publish("contact.deleted", {"id": "a"})
+    hub.publish("contact.deleted", {"id": "b"})
+    assert slow not in hub.subscribers
+    assert slow.get_nowait() is None
+    assert hub.dropped == 1
+
+
+def contact(stamp, **fields):
+    return {"_id": ObjectId(), "name": "Ada", "status": "new", "submittedAt": stamp, **fields}
+
+
+@pytest.fixture
+def finds(mongo, monkeypatch):
+    """Filters passed to contact_submissions.find"""
+    collection_type = type(mongo.contact_submissions)
+    find = collection_type.find
+    calls = []
+
+    def recording_find(collection, *args, **kwargs):
+        if collection.name == "contact_submissions":
+            calls.append(args[0])
+        return find(collection, *args, **kwargs)
+
+    monkeypatch.setattr(collection_type, "find", recording_find)
+    return calls
+
+
+def test_polling_reports_new_contacts_once_without_rereading_sent_ones(mongo, hub, finds):
+    async def run():
+        now = server.utc_now()
+        await mongo.contact_submissions.insert_one(contact(now - timedelta(seconds=5)))
+        feed = await hub._poll_feed_start("submittedAt", "contact.created")
+        await hub._poll_feed(feed)
+        before = events(hub)
+
+        await mongo.contact_submissions.insert_many([contact(now), contact(now)])
+        await hub._poll_feed(feed)
+        finds.clear()
+        await hub._poll_feed(feed)
+        return before, events(hub), list(finds)
+
+    before, after, quiet_finds = asyncio.run(run())
+    assert before == []
+    assert after == ["contact.created", "contact.created"]
+    # Nothing new: one keyset seek, no re-read of the window
+    assert len(quiet_finds) == 1 and "$or" in quiet_finds[0]
+
+
+def test_polling_catches_inserts_stamped_behind_the_cursor(mongo, hub):
+    async def run():
+        now = server.utc_now()
+        feed = await hub._poll_feed_start("submittedAt", "contact.created")
+        await mongo.contact_submissions.insert_one(contact(now))
+        await hub._poll_feed(feed)
+        # A write-behind insert submitted earlier reaches the database later
+        await mongo.contact_submissions.insert_one(contact(now - timedelta(seconds=2)))
+        await hub._poll_feed(feed)
+        await hub._poll_feed(feed)
+        return events(hub)
+
+    assert asyncio.run(run()) == ["contact.created", "contact.created"]
+
+
+def test_polling_reports_each_update(mongo, hub):
+    async def run():
+        now = server.utc_now()
+        existing = contact(now - timedelta(days=1))
+        await mongo.contact_submissions.insert_one(existing)
+        feed = await hub._poll_feed_start("updatedAt", "contact.updated")
+        for seconds in (1, 2):
+            await mongo.contact_submissions.update_one(
+                {"_id": existing["_id"]}, {"$set": {"status": "read", "updatedAt": now + timedelta(seconds=seconds)}}
+            )
+            await hub._poll_feed(feed)
+        await hub._poll_feed(feed)
+        return events(hub)
+
+    assert asyncio.run(run()) == ["contact.updated", "contact.updated"]
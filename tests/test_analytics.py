@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import server
+from server import _next_period, _period_start
+
+
+@pytest.mark.parametrize("day, interval, expected", [
+    (datetime(2024, 3, 14), "day", datetime(2024, 3, 14)),
+    (datetime(2024, 3, 14), "week", datetime(2024, 3, 11)),  # Thursday -> Monday
+    (datetime(2024, 3, 11), "week", datetime(2024, 3, 11)),
+    (datetime(2024, 3, 31), "month", datetime(2024, 3, 1)),
+])
+def test_period_start(day, interval, expected):
+    assert _period_start(day, interval) == expected
+
+
+@pytest.mark.parametrize("period, interval, expected", [
+    (datetime(2024, 2, 28), "day", datetime(2024, 2, 29)),
+    (datetime(2024, 12, 30), "week", datetime(2025, 1, 6)),
+    (datetime(2024, 1, 1), "month", datetime(2024, 2, 1)),
+    (datetime(2024, 12, 1), "month", datetime(2025, 1, 1)),
+])
+def test_next_period(period, interval, expected):
+    assert _next_period(period, interval) == expected
+
+
+@pytest.fixture
+def rollups(mongo):
+    days = [
+        (datetime(2024, 3, 4), {"contacts": 2, "byStatus": {"new": 2}, "byConsultationType": {"audit": 2}}),
+        (datetime(2024, 3, 6), {"contacts": 1, "byStatus": {"new": 1}, "newsletterSignups": 3}),
+        (datetime(2024, 3, 20), {"contacts": 4, "byStatus": {"closed": 4}}),
+    ]
+    asyncio.run(mongo.analytics_daily.insert_many(
+        [{"_id": server._day_key(day), "date": day, **counts} for day, counts in days]
+    ))
+    return mongo
+
+
+def test_timeseries_folds_days_into_weeks_and_fills_gaps(rollups):
+    series = asyncio.run(server.analytics_timeseries(datetime(2024, 3, 1), datetime(2024, 3, 20), "week"))
+    assert [bucket["period"] for bucket in series] == [
+        datetime(2024, 2, 26), datetime(2024, 3, 4), datetime(2024, 3, 11), datetime(2024, 3, 18),
+    ]
+    assert [bucket["contacts"] for bucket in series] == [0, 3, 0, 4]
+    assert series[1]["byStatus"] == {"new": 3}
+    assert series[1]["byConsultationType"] == {"audit": 2}
+    assert series[1]["newsletterSignups"] == 3
+    assert series[2] == {"period": datetime(2024, 3, 11), "contacts": 0, "byConsultationType": {},
+                         "byStatus": {}, "newsletterSignups": 0}
+
+
+def test_timeseries_excludes_days_outside_the_range(rollups):
+    series = asyncio.run(server.analytics_timeseries(datetime(2024, 3, 5), datetime(2024, 3, 31), "month"))
+    assert len(series) == 1
+    assert series[0]["contacts"] == 5
+    assert series[0]["byStatus"] == {"new": 1, "closed": 4}
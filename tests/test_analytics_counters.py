@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+import server
+from server import _published_delta
+
+
+@pytest.mark.parametrize("before, after, expected", [
+    (None, {"published": True}, 1),
+    (None, {"published": False}, 0),
+    ({"published": False}, {"published": True}, 1),
+    ({"published": True}, {"published": False}, -1),
+    ({"published": True}, {"published": True}, 0),
+    ({"published": True}, None, -1),
+    ({}, None, 0),
+])
+def test_published_delta(before, after, expected):
+    assert _published_delta(before, after) == expected
+
+
+def test_counters_warm_on_first_read_then_track_deltas(mongo):
+    async def run():
+        await mongo.contact_submissions.insert_many([{"status": "new"}, {"status": "new"}, {"status": "closed"}])
+        await mongo.blog_posts.insert_many([{"published": True}, {"published": False}])
+        # Cold counters ignore deltas rather than creating a partial document
+        await server.bump_analytics_counters(totalContacts=1)
+        assert await mongo.analytics_counters.find_one({}) is None
+
+        totals = await server.read_analytics_counters()
+        await server.bump_analytics_counters(totalContacts=1, newContacts=1, totalBlogPosts=0)
+        await server.bump_analytics_counters(newContacts=-2)
+        return totals, await server.read_analytics_counters()
+
+    warmed, bumped = asyncio.run(run())
+    assert warmed == {"totalContacts": 3, "newContacts": 2, "totalTestimonials": 0, "totalBlogPosts": 1,
+                      "newsletterSubscribers": 0}
+    assert bumped == {**warmed, "totalContacts": 4, "newContacts": 1}
+
+
+def test_reconcile_replaces_drifted_totals(mongo):
+    async def run():
+        await mongo.newsletter_subscriptions.insert_many([{"email": "a@example.com"}, {"email": "b@example.com"}])
+        await server.reconcile_analytics_counters()
+        await server.bump_analytics_counters(newsletterSubscribers=5)
+        await server.reconcile_analytics_counters()
+        return await server.read_analytics_counters()
+
+    assert asyncio.run(run())["newsletterSubscribers"] == 2
@@ -0,0 +1,28 @@
+import pytest
+
+import server
+from server import ResponseCache, create_access_token, verify_token
+
+
+@pytest.fixture(autouse=True)
+def fresh_auth_cache(monkeypatch):
+    monkeypatch.setattr(server, "auth_cache", ResponseCache(max_entries=16, ttl_seconds=3600))
+
+
+def test_verify_token_caches_the_decoded_payload():
+    token = create_access_token({"sub": "admin@example.com"})
+    assert verify_token(token)["sub"] == "admin@example.com"
+    assert server.auth_cache.get("tokens", token)["sub"] == "admin@example.com"
+
+
+def test_cached_token_is_rejected_once_expired(monkeypatch):
+    token = create_access_token({"sub": "admin@example.com"})
+    assert verify_token(token) is not None
+    expires = server.auth_cache.get("tokens", token)["exp"]
+    monkeypatch.setattr(server.time, "time", lambda: expires + 1)
+    assert verify_token(token) is None
+
+
+def test_invalid_token_is_not_cached():
+    assert verify_token("not-a-jwt") is None
+    assert server.auth_cache.stats()["entries"] == 0
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateOne
+
+import server
+from server import bulk_apply, bulk_published_delta, bulk_summary, check_bulk_size
+
+
+@pytest.mark.parametrize("action, expected", [("publish", 1), ("unpublish", -2), ("delete", -2)])
+def test_bulk_published_delta(action, expected):
+    applied = [{"published": True}, {"published": False}, {"published": True}]
+    assert bulk_published_delta(action, applied) == expected
+
+
+@pytest.mark.parametrize("items", [[], ["x"] * (server.BULK_MAX_ITEMS + 1)])
+def test_check_bulk_size_rejects_empty_and_oversized(items):
+    with pytest.raises(HTTPException) as excinfo:
+        check_bulk_size(items)
+    assert excinfo.value.status_code == 400
+
+
+def test_bulk_apply_reports_each_item_and_returns_previous_state(mongo):
+    async def run():
+        published, draft = ObjectId(), ObjectId()
+        await mongo.blog_posts.insert_many([{"_id": published, "published": True}, {"_id": draft, "published": False}])
+        ids = [str(draft), "not-an-id", str(ObjectId()), str(published)]
+        results, applied = await bulk_apply(
+            mongo.blog_posts, ids,
+            lambda object_id: UpdateOne({"_id": object_id}, {"$set": {"published": True}}),
+            {"published": 1},
+        )
+        return results, applied, await mongo.blog_posts.count_documents({"published": True})
+
+    results, applied, published_count = asyncio.run(run())
+    assert [result["success"] for result in results] == [True, False, False, True]
+    assert [result.get("error") for result in results] == [None, "Invalid id", "Not found", None]
+    assert sorted(previous["published"] for previous in applied) == [False, True]
+    assert bulk_published_delta("publish", applied) == 1
+    assert published_count == 2
+    assert bulk_summary(results)["failed"] == 2
@@ -0,0 +1,58 @@
+import pytest
+from starlette.requests import Request
+
+import server
+from server import _is_not_modified, encoded_etag, negotiate_encoding
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(server, "brotli", None)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("identity", None),
+    ("", None),
+    ("*", "br"),
+    ("*;q=0, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("gzip;q=bogus, br", "br"),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    if server.brotli is None:
+        pytest.skip("brotli is not installed")
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "gzip"),
+    ("br", None),
+    ("*", "gzip"),
+])
+def test_negotiate_encoding_without_brotli(without_brotli, accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_encoded_etag_suffixes_strong_etags_only():
+    assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert encoded_etag('"abc"', "br") == '"abc-br"'
+    assert encoded_etag('W/"abc"', "gzip") == 'W/"abc"'
+
+
+@pytest.mark.parametrize("if_none_match, accept_encoding, expected", [
+    ('"abc-gzip"', "gzip", True),
+    ('"abc"', "gzip", True),
+    # A gzip validator says nothing about the identity or br representation
+    ('"abc-gzip"', "identity", False),
+    ('"abc-gzip"', "br, gzip", False),
+    ('"abc-br"', "br, gzip", True),
+])
+def test_encoded_etags_validate_only_the_negotiated_coding(monkeypatch, if_none_match, accept_encoding, expected):
+    monkeypatch.setattr(server, "brotli", object())  # only its presence matters to negotiation
+    monkeypatch.setattr(server, "COMPRESSION_ENABLED", True)
+    request = Request({"type": "http", "headers": [
+        (b"if-none-match", if_none_match.encode()), (b"accept-encoding", accept_encoding.encode()),
+    ]})
+    assert _is_not_modified(request, '"abc"', None) is expected
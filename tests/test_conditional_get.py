@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from starlette.requests import Request
+
+import server
+from server import ResponseCache, _is_not_modified, content_validators
+
+
+def request_with(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/blog",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ("*", True),
+    ('"other"', False),
+])
+def test_if_none_match(if_none_match, expected):
+    assert _is_not_modified(request_with(if_none_match=if_none_match), '"abc"', None) is expected
+
+
+def test_if_modified_since():
+    last_modified = datetime(2024, 5, 1, 12, 0, 0, 500000)
+    assert _is_not_modified(request_with(if_modified_since="Wed, 01 May 2024 12:00:00 GMT"), '"abc"', last_modified)
+    assert not _is_not_modified(request_with(if_modified_since="Wed, 01 May 2024 11:59:59 GMT"), '"abc"', last_modified)
+    assert not _is_not_modified(request_with(if_modified_since="garbage"), '"abc"', last_modified)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    request = request_with(if_none_match='"other"', if_modified_since="Wed, 01 May 2099 12:00:00 GMT")
+    assert not _is_not_modified(request, '"abc"', datetime(2024, 5, 1))
+
+
+def test_validator_aggregate_is_shared_by_every_page(mongo, monkeypatch):
+    monkeypatch.setattr(server, "response_cache", ResponseCache())
+    posts = mongo.blog_posts
+    asyncio.run(posts.insert_many([
+        {"published": True, "updatedAt": datetime(2024, 5, day)} for day in range(1, 4)
+    ]))
+    calls = []
+    aggregate = posts.aggregate
+    monkeypatch.setattr(posts, "aggregate", lambda *args, **kwargs: calls.append(1) or aggregate(*args, **kwargs))
+
+    async def validators(page):
+        return await content_validators("blog", ("list", page), posts, {"published": True})
+
+    first, second = asyncio.run(validators(0)), asyncio.run(validators(10))
+    assert len(calls) == 1
+    assert first[1:] == second[1:] == (datetime(2024, 5, 3), 3)
+    assert first[0] != second[0]
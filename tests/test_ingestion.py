@@ -0,0 +1,134 @@
+import asyncio
+import os
+
+import pytest
+from bson import ObjectId, json_util
+
+import server
+from server import IngestionQueue
+
+
+def contact(**fields):
+    return {"_id": ObjectId(), "name": "Ada", "email": "ada@example.com", "message": "Hello",
+            "status": "new", "submittedAt": server.utc_now(), **fields}
+
+
+def spool_line(kind, doc):
+    return json_util.dumps({"kind": kind, "doc": doc}) + "\n"
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return tmp_path / "spool.ndjson"
+
+
+def test_submissions_are_written_in_batches(mongo):
+    async def run():
+        queue = IngestionQueue(max_size=100, batch_size=10, flush_interval=0.05)
+        await queue.start()
+        assert all([await queue.submit("contact", contact()) for _ in range(25)])
+        await queue.submit("newsletter", {"email": "a@example.com", "subscribedAt": server.utc_now()})
+        await queue.submit("newsletter", {"email": "a@example.com", "subscribedAt": server.utc_now()})
+        await queue.stop()
+        return queue.stats(), await mongo.contact_submissions.count_documents({}), \
+            await mongo.newsletter_subscriptions.count_documents({})
+
+    stats, contacts, subscribers = asyncio.run(run())
+    assert (contacts, subscribers) == (25, 1)
+    assert stats["accepted"] == stats["flushed"] == 27
+    assert 3 <= stats["batches"] < 27
+
+
+def test_submit_is_refused_when_stopped_or_full(mongo):
+    async def run():
+        queue = IngestionQueue(max_size=1, batch_size=10, flush_interval=0.05)
+        refused_before_start = not await queue.submit("contact", contact())
+        await queue.start()
+        queue._queue.put_nowait(("contact", contact(), 0))  # fill it without the worker draining
+        refused_when_full = not await queue.submit("contact", contact())
+        queue._worker.cancel()
+        return refused_before_start, refused_when_full, queue.rejected
+
+    assert asyncio.run(run()) == (True, True, 2)
+
+
+def test_acknowledged_submissions_are_spooled_until_flushed(mongo, spool, monkeypatch):
+    async def run():
+        released = asyncio.Event()
+        write_contacts = server.INGEST_WRITERS["contact"]
+
+        async def blocked_write(docs):
+            await released.wait()
+            return await write_contacts(docs)
+
+        monkeypatch.setitem(server.INGEST_WRITERS, "contact", blocked_write)
+        queue = IngestionQueue(max_size=100, batch_size=10, flush_interval=0.01, spool_path=str(spool))
+        await queue.start()
+        submitted = [contact() for _ in range(3)]
+        for doc in submitted:
+            assert await queue.submit("contact", doc)
+        # Acknowledged while the database write is still pending: already on disk
+        segments = sorted(spool.parent.glob("spool.ndjson.*"))
+        spooled = [json_util.loads(line)["doc"]["_id"] for path in segments for line in path.read_text().splitlines()]
+        released.set()
+        await queue.stop()
+        return submitted, segments, spooled, sorted(spool.parent.iterdir()), queue.stats()
+
+    submitted, segments, spooled, remaining, stats = asyncio.run(run())
+    assert [path.name.split(".")[2] for path in segments] == [str(os.getpid())] * len(segments)
+    assert spooled == [doc["_id"] for doc in submitted]
+    # Flushed segments are deleted
+    assert remaining == []
+    assert stats["spoolSegments"] == 0
+
+
+def test_orphaned_spools_are_segments_of_exited_processes(spool, monkeypatch):
+    monkeypatch.setattr(server, "_process_alive", lambda pid: pid == 1111)
+    for name in ["spool.ndjson", "spool.ndjson.2222", "spool.ndjson.2222.3", f"spool.ndjson.{os.getpid()}.0",
+                 "spool.ndjson.1111.0", "spool.ndjson.bak", "spool.ndjson.2222.x", "other.ndjson.2222.0"]:
+        (spool.parent / name).write_text("")
+    queue = IngestionQueue(max_size=10, batch_size=10, flush_interval=0.01, spool_path=str(spool))
+    assert [path.name for path in queue._orphaned_spools()] == sorted([
+        "spool.ndjson", "spool.ndjson.2222", "spool.ndjson.2222.3", f"spool.ndjson.{os.getpid()}.0",
+    ])
+
+
+def test_replay_writes_orphans_once_and_removes_them(mongo, spool, monkeypatch):
+    monkeypatch.setattr(server, "_process_alive", lambda pid: False)
+    stored, replayed = contact(), contact()
+
+    async def run():
+        await mongo.contact_submissions.insert_one(dict(stored))
+        (spool.parent / "spool.ndjson.2222.0").write_text(
+            spool_line("contact", stored) + spool_line("contact", replayed) + "not json\n"
+        )
+        (spool.parent / "spool.ndjson.2222.1").write_text(
+            spool_line("newsletter", {"email": "b@example.com", "subscribedAt": server.utc_now()})
+        )
+        queue = IngestionQueue(max_size=10, batch_size=10, flush_interval=0.01, spool_path=str(spool))
+        await queue.start()
+        await queue.stop()
+        return (await mongo.contact_submissions.count_documents({}),
+                await mongo.newsletter_subscriptions.count_documents({}))
+
+    contacts, subscribers = asyncio.run(run())
+    assert (contacts, subscribers) == (2, 1)
+    assert list(spool.parent.iterdir()) == []
+
+
+def test_replay_skips_segments_another_worker_removed(mongo, spool, monkeypatch):
+    monkeypatch.setattr(server, "_process_alive", lambda pid: False)
+    doc = contact()
+    (spool.parent / "spool.ndjson.2222.0").write_text(spool_line("contact", doc))
+    gone = spool.parent / "spool.ndjson.2222.1"
+    gone.write_text(spool_line("contact", contact()))
+    queue = IngestionQueue(max_size=10, batch_size=10, flush_interval=0.01, spool_path=str(spool))
+    orphaned = queue._orphaned_spools()
+    gone.unlink()
+    monkeypatch.setattr(queue, "_orphaned_spools", lambda: orphaned)
+
+    async def run():
+        await queue._replay_spool()
+        return await mongo.contact_submissions.count_documents({})
+
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,23 @@
+from server import render_markdown
+
+
+def test_render_markdown_escapes_raw_html():
+    html = render_markdown("Hello <script>alert(1)</script>\n\n<img src=x onerror=alert(1)>")["contentHtml"]
+    assert "<script>" not in html
+    assert "<img" not in html
+    assert "&lt;script&gt;" in html
+
+
+def test_render_markdown_drops_javascript_links():
+    html = render_markdown("[click](javascript:alert(1)) and [ok](https://example.com)")["contentHtml"]
+    assert 'href="javascript:' not in html
+    assert '<a href="https://example.com">ok</a>' in html
+
+
+def test_render_markdown_anchors_and_toc():
+    rendered = render_markdown("# Intro\n\n## Intro\n\ntext")
+    assert rendered["toc"] == [
+        {"level": 1, "title": "Intro", "id": "intro"},
+        {"level": 2, "title": "Intro", "id": "intro-1"},
+    ]
+    assert '<h1 id="intro">' in rendered["contentHtml"]
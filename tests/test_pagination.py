@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from server import decode_cursor, encode_cursor, keyset_query
+
+
+def test_cursor_round_trip():
+    doc = {"_id": ObjectId(), "createdAt": datetime(2024, 5, 1, 12, 30, 15, 123000)}
+    assert decode_cursor(encode_cursor(doc, "createdAt")) == (doc["createdAt"], doc["_id"])
+
+
+def test_keyset_query_breaks_ties_on_id():
+    doc = {"_id": ObjectId(), "createdAt": datetime(2024, 5, 1)}
+    query = keyset_query({"published": True}, "createdAt", encode_cursor(doc, "createdAt"))
+    assert query == {"$and": [
+        {"published": True},
+        {"$or": [
+            {"createdAt": {"$lt": doc["createdAt"]}},
+            {"createdAt": doc["createdAt"], "_id": {"$lt": doc["_id"]}},
+        ]},
+    ]}
+
+
+def test_keyset_query_without_cursor_or_filter():
+    assert keyset_query({"published": True}, "createdAt", None) == {"published": True}
+    doc = {"_id": ObjectId(), "createdAt": datetime(2024, 5, 1)}
+    assert "$and" not in keyset_query({}, "createdAt", encode_cursor(doc, "createdAt"))
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30"])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+import server
+from server import AdmissionController, MemoryRateLimitBackend
+
+
+def take(backend, key, rate=1.0, burst=2):
+    return asyncio.run(backend.take(key, rate, burst))
+
+
+def test_burst_then_retry_after(clock):
+    backend = MemoryRateLimitBackend()
+    assert take(backend, "ip") == 0
+    assert take(backend, "ip") == 0
+    assert take(backend, "ip") == pytest.approx(1.0)
+    clock[0] += 0.5
+    assert take(backend, "ip") == pytest.approx(0.5)
+
+
+def test_tokens_refill_up_to_burst(clock):
+    backend = MemoryRateLimitBackend()
+    take(backend, "ip")
+    take(backend, "ip")
+    clock[0] += 60
+    assert [take(backend, "ip") for _ in range(3)][:2] == [0, 0]
+    assert take(backend, "ip") > 0
+
+
+def test_keys_are_independent_and_lru_evicted(clock):
+    backend = MemoryRateLimitBackend(max_keys=2)
+    take(backend, "a", burst=1)
+    assert take(backend, "b", burst=1) == 0
+    take(backend, "c", burst=1)
+    # "a" was evicted, so it starts with a full bucket again
+    assert take(backend, "a", burst=1) == 0
+    assert take(backend, "c", burst=1) > 0
+
+
+def scope_with(*forwarded_for, client=("10.0.0.1", 1234)):
+    return {"client": client, "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded_for]}
+
+
+def test_forwarded_for_is_ignored_unless_trusted(monkeypatch):
+    monkeypatch.setattr(server, "RATE_LIMIT_TRUST_FORWARDED", False)
+    assert AdmissionController.client_ip(scope_with("1.2.3.4")) == "10.0.0.1"
+
+
+@pytest.mark.parametrize("hops, headers, expected", [
+    (1, ["203.0.113.7"], "203.0.113.7"),
+    # The client controls everything left of what our proxy appended
+    (1, ["6.6.6.6, 203.0.113.7"], "203.0.113.7"),
+    (1, ["6.6.6.6", "203.0.113.7"], "203.0.113.7"),
+    (2, ["6.6.6.6, 203.0.113.7, 172.16.0.2"], "203.0.113.7"),
+    (3, ["203.0.113.7, 172.16.0.2"], "203.0.113.7"),
+    (1, [], "10.0.0.1"),
+])
+def test_client_ip_counts_trusted_hops_from_the_right(monkeypatch, hops, headers, expected):
+    monkeypatch.setattr(server, "RATE_LIMIT_TRUST_FORWARDED", True)
+    monkeypatch.setattr(server, "RATE_LIMIT_TRUSTED_PROXY_HOPS", hops)
+    assert AdmissionController.client_ip(scope_with(*headers)) == expected
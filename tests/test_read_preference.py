@@ -0,0 +1,28 @@
+import pytest
+
+import server
+from server import ResponseCache, public_reads
+
+
+@pytest.fixture
+def databases(monkeypatch, clock):
+    primary, public = object(), object()
+    monkeypatch.setattr(server, "db", primary)
+    monkeypatch.setattr(server, "public_db", public)
+    monkeypatch.setattr(server, "response_cache", ResponseCache())
+    monkeypatch.setattr(server, "MONGO_PUBLIC_PRIMARY_AFTER_WRITE_SECONDS", 30)
+    return primary, public
+
+
+def test_public_reads_use_the_public_database_by_default(databases):
+    primary, public = databases
+    assert public_reads("blog") is public
+
+
+def test_reads_after_an_invalidation_go_to_the_primary_for_a_while(databases, clock):
+    primary, public = databases
+    server.response_cache.invalidate("blog")
+    assert public_reads("blog") is primary
+    assert public_reads("services") is public
+    clock[0] += 31
+    assert public_reads("blog") is public
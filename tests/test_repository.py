@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from server import Repository
+
+
+@pytest.fixture
+def services(mongo):
+    return Repository("services", insert_timestamps=("updatedAt",))
+
+
+def test_insert_returns_the_stored_document(mongo, services):
+    async def run():
+        document = await services.insert({"title": "Audit"})
+        return document, await mongo.services.find_one({"_id": document["_id"]})
+
+    document, stored = asyncio.run(run())
+    assert isinstance(document["_id"], ObjectId)
+    assert set(document) == {"_id", "title", "updatedAt"}
+    assert stored["title"] == "Audit"
+
+
+def test_update_with_previous_returns_both_images(mongo, services):
+    async def run():
+        document = await services.insert({"title": "Audit", "published": False})
+        previous, updated = await services.update_with_previous(str(document["_id"]), {"published": True})
+        return document, previous, updated, await mongo.services.find_one({"_id": document["_id"]})
+
+    document, previous, updated, stored = asyncio.run(run())
+    assert previous["published"] is False
+    assert updated["published"] is True
+    assert updated["title"] == "Audit"
+    assert updated["updatedAt"] >= previous["updatedAt"]
+    # The returned image matches what the atomic update stored
+    assert stored == updated
+
+
+@pytest.mark.parametrize("raw_id", ["not-an-id", str(ObjectId()), None])
+def test_missing_or_malformed_ids_return_none(services, raw_id):
+    async def run():
+        return (
+            await services.update(raw_id, {"title": "x"}),
+            await services.update_with_previous(raw_id, {"title": "x"}),
+            await services.delete(raw_id),
+        )
+
+    assert asyncio.run(run()) == (None, (None, None), None)
@@ -0,0 +1,83 @@
+import asyncio
+
+from server import ResponseCache, cached_response
+
+
+def test_get_returns_stored_value_and_counts_hits(clock):
+    cache = ResponseCache(max_entries=4, ttl_seconds=60)
+    assert cache.get("blog", "list") is None
+    cache.set("blog", "list", [1, 2])
+    assert cache.get("blog", "list") == [1, 2]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hitRatio"]) == (1, 1, 0.5)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(max_entries=4, ttl_seconds=60)
+    cache.set("blog", "list", "value")
+    clock[0] += 59
+    assert cache.get("blog", "list") == "value"
+    clock[0] += 2
+    assert cache.get("blog", "list") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("blog", "a", 1)
+    cache.set("blog", "b", 2)
+    cache.get("blog", "a")
+    cache.set("blog", "c", 3)
+    assert cache.get("blog", "b") is None
+    assert cache.get("blog", "a") == 1
+    assert cache.get("blog", "c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_drops_only_the_namespace_and_bumps_its_version(clock):
+    cache = ResponseCache(max_entries=4, ttl_seconds=60)
+    cache.set("blog", "list", 1)
+    cache.set("services", "list", 2)
+    cache.invalidate("blog")
+    assert cache.get("blog", "list") is None
+    assert cache.get("services", "list") == 2
+    stats = cache.stats()
+    assert stats["versions"] == {"blog": 1}
+    assert stats["invalidations"] == 1
+
+
+def test_cached_response_loads_once(clock):
+    cache = ResponseCache(max_entries=4, ttl_seconds=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return "value"
+
+    async def run():
+        return [await cached_response("services", "list", load, cache=cache) for _ in range(3)]
+
+    assert asyncio.run(run()) == ["value"] * 3
+    assert len(calls) == 1
+
+
+def test_load_racing_an_invalidation_is_not_stored(clock):
+    cache = ResponseCache(max_entries=4, ttl_seconds=60)
+
+    async def load():
+        # An admin write lands while the read is in flight
+        cache.invalidate("services")
+        return "old"
+
+    assert asyncio.run(cached_response("services", "list", load, cache=cache)) == "old"
+    assert cache.get("services", "list") is None
+
+
+def test_set_with_stale_version_is_dropped(clock):
+    cache = ResponseCache(max_entries=4, ttl_seconds=60)
+    version = cache.version("blog")
+    cache.invalidate("blog")
+    cache.set("blog", "list", "old", version=version)
+    assert cache.get("blog", "list") is None
+    cache.set("blog", "list", "new", version=cache.version("blog"))
+    assert cache.get("blog", "list") == "new"
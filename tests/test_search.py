@@ -0,0 +1,20 @@
+from server import highlight_snippet, search_terms
+
+
+def test_highlight_snippet_escapes_text_and_matches():
+    snippet = highlight_snippet("Tuning <script>alert(1)</script> queries & indexes", ["script", "index"])
+    assert "<script" not in snippet
+    assert "&lt;<mark>script</mark>" in snippet
+    assert "&amp;" in snippet
+    assert "<mark>indexes</mark>" in snippet
+
+
+def test_highlight_snippet_windows_around_first_match():
+    text = "filler " * 100 + "replication lag" + " filler" * 100
+    snippet = highlight_snippet(text, ["replication"], width=60)
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<mark>replication</mark>" in snippet
+
+
+def test_search_terms_ignore_negations():
+    assert search_terms("Mongo -postgres indexes") == ["mongo", "indexes"]
@@ -0,0 +1,121 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+
+import server
+from server import CacheSync, MongoLock, ResponseCache
+
+
+def test_lock_is_exclusive_until_released_or_expired(mongo):
+    async def run():
+        first, second = MongoLock("job", lease_seconds=60), MongoLock("job", lease_seconds=60)
+        results = [await first.try_acquire(), await second.try_acquire(), await first.try_acquire()]
+        await first.release()
+        results.append(await second.try_acquire())
+        expiring = MongoLock("other", lease_seconds=0)
+        await expiring.try_acquire()
+        results.append(await MongoLock("other").try_acquire())
+        return results
+
+    assert asyncio.run(run()) == [True, False, True, True, True]
+
+
+def test_release_only_drops_our_own_lease(mongo):
+    async def run():
+        holder, other = MongoLock("job"), MongoLock("job")
+        await holder.try_acquire()
+        await other.release()
+        return await mongo.locks.find_one({"_id": "job"})
+
+    assert asyncio.run(run()) is not None
+
+
+def test_waiting_worker_gets_the_lock_once_released(mongo):
+    async def run():
+        order = []
+
+        async def worker(name, hold):
+            async with MongoLock("job", lease_seconds=60):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(worker("first", 0.2), worker("second", 0))
+        return order
+
+    assert asyncio.run(run()) == ["first", "second"]
+
+
+def test_cache_sync_applies_other_workers_events_once():
+    cache = ResponseCache()
+    sync = CacheSync(enabled=True, max_events=10)
+    sync.origin = "worker-a"
+    sync._resume_at = server.utc_now()  # set by start()
+    sync.caches = {"responses": (cache,)}
+
+    def event(origin, cache_name="responses"):
+        return {"_id": ObjectId(), "at": server.utc_now(), "cache": cache_name, "namespaces": ["blog"], "origin": origin}
+
+    remote = event("worker-b")
+    sync._apply(remote)
+    sync._apply(remote)  # re-delivered when a tailing cursor is re-opened
+    sync._apply(event("worker-a"))
+    sync._apply(event("worker-b", cache_name="unknown"))
+    assert cache.version("blog") == 1
+    assert sync.applied == 1
+
+
+@pytest.fixture
+def migration(mongo, monkeypatch):
+    calls = {"indexes": 0, "seed": 0, "failed": []}
+
+    async def ensure_indexes():
+        calls["indexes"] += 1
+        return list(calls["failed"])
+
+    async def seed_default_data():
+        calls["seed"] += 1
+        await asyncio.sleep(0.05)
+
+    async def reconcile_analytics_counters():
+        return {}
+
+    monkeypatch.setattr(server, "ensure_indexes", ensure_indexes)
+    monkeypatch.setattr(server, "seed_default_data", seed_default_data)
+    monkeypatch.setattr(server, "reconcile_analytics_counters", reconcile_analytics_counters)
+    return calls
+
+
+def test_concurrent_workers_migrate_once(mongo, migration):
+    async def run():
+        await asyncio.gather(*(server.run_startup_migrations() for _ in range(4)))
+        await server.run_startup_migrations()
+        return await mongo.migrations.find_one({"_id": "startup"})
+
+    marker = asyncio.run(run())
+    assert migration["seed"] == 1
+    assert marker["version"] == server.startup_migration_version()
+    assert "failedIndexes" not in marker
+
+
+def test_failed_index_builds_are_retried_on_the_next_startup(mongo, migration, monkeypatch):
+    migration["failed"] = ["newsletter_subscriptions"]
+
+    async def run():
+        # Workers starting alongside the failed attempt don't repeat it
+        await asyncio.gather(*(server.run_startup_migrations() for _ in range(3)))
+        attempts = migration["indexes"]
+        failed_marker = await mongo.migrations.find_one({"_id": "startup"})
+
+        # Restart after the data was fixed
+        migration["failed"] = []
+        monkeypatch.setattr(server, "_process_started_at", server.utc_now() + timedelta(seconds=1))
+        await server.run_startup_migrations()
+        return attempts, failed_marker, await mongo.migrations.find_one({"_id": "startup"})
+
+    attempts, failed_marker, marker = asyncio.run(run())
+    assert attempts == 1
+    assert failed_marker["failedIndexes"] == ["newsletter_subscriptions"]
+    assert migration["indexes"] == 2
+    assert "failedIndexes" not in marker